@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Datadog Series Decode Benchmark
+Compares response.json()-style full decoding with SeriesStreamDecoder on
+large "by {host}" metrics query responses (parse time and peak memory)
+"""
+
+import os
+import json
+import time
+import tracemalloc
+
+from complete_itsm_agent import SeriesStreamDecoder
+from mock_itsm_servers import MockDatadogServer
+
+CHUNK_SIZE = 65536
+
+def build_body(hosts: int, minutes: int) -> bytes:
+    """Synthetic query response: one series per host, one point per minute"""
+    server = MockDatadogServer(fleet_size=hosts)
+    server.httpd.server_close()  # Only the payload generator is needed
+    end = int(time.time())
+    status, payload = server.handle('GET', '/api/v1/query', {
+        'query': 'avg:system.cpu.user{*} by {host}',
+        'from': str(end - minutes * 60),
+        'to': str(end)
+    }, None)
+    return json.dumps(payload).encode()
+
+def full_decode(body: bytes) -> list:
+    """Current path: materialize the whole document, then read the latest points"""
+    data = json.loads(body)
+    return [serie['pointlist'][-1][1] for serie in data['series'] if serie['pointlist']]
+
+def stream_decode(body: bytes) -> list:
+    """Streaming path, fed in network-sized chunks"""
+    decoder = SeriesStreamDecoder()
+    for start in range(0, len(body), CHUNK_SIZE):
+        decoder.feed(body[start:start + CHUNK_SIZE])
+    data = decoder.close()
+    return [serie['values'][-1] for serie in data['series'] if serie['values']]
+
+def measure(decode, body: bytes, repeats: int) -> tuple:
+    """(best wall time, peak traced allocation) for one decode path"""
+    best = float('inf')
+    for _ in range(repeats):
+        started = time.perf_counter()
+        decode(body)
+        best = min(best, time.perf_counter() - started)
+
+    tracemalloc.start()
+    decode(body)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+def main():
+    """Run the benchmark over a few response sizes"""
+    repeats = int(os.getenv('BENCHMARK_REPEATS', '5'))
+    sizes = [(50, 60), (500, 60), (500, 1440), (2000, 1440)]
+
+    print(f"{'hosts':>6} {'points':>9} {'body MB':>8} | {'json s':>7} {'json MB':>8} | "
+          f"{'stream s':>8} {'stream MB':>9} | {'mem x':>6}")
+    for hosts, minutes in sizes:
+        body = build_body(hosts, minutes)
+        assert full_decode(body) == stream_decode(body)
+
+        full_time, full_peak = measure(full_decode, body, repeats)
+        stream_time, stream_peak = measure(stream_decode, body, repeats)
+        print(f"{hosts:>6} {hosts * minutes:>9} {len(body) / 1e6:>8.1f} | {full_time:>7.3f} {full_peak / 1e6:>8.1f} | "
+              f"{stream_time:>8.3f} {stream_peak / 1e6:>9.1f} | {full_peak / stream_peak:>6.1f}")
+
+    print("\nPeak memory excludes the body itself; the streaming path never holds the whole body.")
+
+if __name__ == "__main__":
+    main()
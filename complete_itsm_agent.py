@@ -5,13 +5,34 @@ Fixed memory threshold logic + ServiceNow integration with proper auth handling
 """
 
 import os
+import re
+import sys
 import json
 import time
 import logging
 import requests
 import base64
+import string
+import math
+import heapq
+import random
+import mmap
+import pickle
+import shutil
+import struct
+import zlib
+import hashlib
+import asyncio
+import socket
+import threading
 from datetime import datetime, timezone, timedelta
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
 from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait as wait_futures
+from requests.adapters import HTTPAdapter
 
 # LangChain imports (optional)
 try:
@@ -21,17 +42,571 @@ except ImportError:
     LANGCHAIN_AVAILABLE = False
     print("LangChain not available, using direct OpenAI integration")
 
+# psutil (optional) for local metric collection on non-Linux hosts
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def parse_servicenow_time(value: str) -> Optional[datetime]:
+    """Parse a ServiceNow timestamp (UTC, 'YYYY-MM-DD HH:MM:SS')"""
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+def iter_table_records(instance_url: str, headers: Dict, table: str, query: str = '', fields: str = '',
+                       page_size: int = 100, max_results: Optional[int] = None, offset: int = 0,
+                       session: Optional[requests.Session] = None):
+    """Stream Table API records page by page with field projection
+    
+    Uses keyset pagination on sys_id when the query has no explicit ORDERBY
+    (stable and O(page) on the server), and sysparm_offset otherwise. Offset
+    reads of unordered queries are ordered by sys_id too, so they continue
+    the same sequence as the keyset pages before them.
+    """
+    http = session or requests
+    url = f"{instance_url.rstrip('/')}/api/now/table/{table}"
+    keyset = 'ORDERBY' not in query and offset == 0
+    if keyset and fields and 'sys_id' not in fields.split(','):
+        fields = f"{fields},sys_id"
+    if not keyset and 'ORDERBY' not in query:
+        query = '^'.join(filter(None, (query, 'ORDERBYsys_id')))
+    
+    last_sys_id = ''
+    returned = 0
+    
+    while max_results is None or returned < max_results:
+        limit = page_size if max_results is None else min(page_size, max_results - returned)
+        params = {
+            'sysparm_exclude_reference_link': 'true',
+            'sysparm_no_count': 'true',
+            'sysparm_limit': limit
+        }
+        if fields:
+            params['sysparm_fields'] = fields
+        
+        if keyset:
+            clauses = [c for c in (query, f"sys_id>{last_sys_id}" if last_sys_id else '') if c]
+            params['sysparm_query'] = '^'.join(clauses + ['ORDERBYsys_id'])
+        else:
+            params['sysparm_query'] = query
+            params['sysparm_offset'] = offset
+        
+        response = http.get(url, headers=headers, params=params, timeout=30)
+        response.raise_for_status()
+        records = response.json().get('result', [])
+        
+        for record in records:
+            yield record
+        returned += len(records)
+        
+        if len(records) < limit:
+            break
+        if keyset:
+            last_sys_id = records[-1].get('sys_id', '')
+        else:
+            offset += len(records)
+
+class TicketTemplate:
+    """Ticket text template ({field} / {field:spec} placeholders) parsed once into segments"""
+    
+    def __init__(self, source: str, fields: Optional[set] = None):
+        self.source = source
+        segments = []  # (literal, field or None, format spec)
+        
+        for literal, field, spec, conversion in string.Formatter().parse(source):
+            if field is not None:
+                if not field.isidentifier() or conversion or (spec and '{' in spec):
+                    raise ValueError(f"Unsupported template placeholder: {{{field}}}")
+                if fields is not None and field not in fields:
+                    raise ValueError(f"Unknown template field: {field}")
+            segments.append((literal, field, spec or ''))
+        
+        self.segments = tuple(segments)
+    
+    def render(self, context: Dict) -> str:
+        """Render with a flat context dict"""
+        return ''.join(literal if field is None else literal + format(context[field], spec)
+                       for literal, field, spec in self.segments)
+
+class TicketStateCache:
+    """Local ticket state kept current by polling sys_updated_on watermark deltas
+    
+    Only tickets matching filter_query are synced (the agent's own, e.g.
+    sys_created_by=<integration user>), and closed tickets are dropped after
+    closed_ttl seconds, so memory and snapshots stay bounded.
+    """
+    
+    SYNC_FIELDS = 'sys_id,number,state,short_description,sys_created_on,sys_updated_on,sys_created_by,correlation_id'
+    CLOSED_STATES = {'6', '7', '8', '106', '107'}  # Resolved/Closed/Canceled (incident + problem)
+    
+    def __init__(self, instance_url: str, headers: Dict, tables: tuple = ('incident', 'problem'),
+                 filter_query: str = '', page_size: int = 200, min_sync_interval: int = 30,
+                 lookback_hours: int = 24, closed_ttl: int = 86400, session: Optional[requests.Session] = None):
+        self.instance_url = instance_url.rstrip('/')
+        self.headers = headers
+        self.session = session
+        self.tables = tables
+        self.filter_query = filter_query
+        self.page_size = page_size
+        self.min_sync_interval = min_sync_interval
+        self.lookback_hours = lookback_hours
+        self.closed_ttl = closed_ttl  # Seconds a closed ticket stays cached after its last update
+        
+        self.tickets = {}      # number -> record (with 'table')
+        self.watermarks = {}   # table -> last seen sys_updated_on
+        self.last_sync = 0.0
+        self._lock = threading.Lock()
+    
+    def sync(self, force: bool = False) -> int:
+        """Pull records updated since the watermark; returns number of records applied"""
+        if not force and time.time() - self.last_sync < self.min_sync_interval:
+            return 0
+        
+        applied = 0
+        for table in self.tables:
+            watermark = self.watermarks.get(table)
+            if not watermark:
+                start = datetime.now(timezone.utc) - timedelta(hours=self.lookback_hours)
+                watermark = start.strftime('%Y-%m-%d %H:%M:%S')
+            
+            newest = watermark
+            try:
+                # >= so records sharing the watermark second are not missed; upserts are idempotent
+                clauses = [self.filter_query, f"sys_updated_on>={watermark}", 'ORDERBYsys_updated_on']
+                records = iter_table_records(
+                    self.instance_url, self.headers, table, query='^'.join(filter(None, clauses)),
+                    fields=self.SYNC_FIELDS, page_size=self.page_size, session=self.session
+                )
+                for record in records:
+                    self.record(table, record)
+                    newest = max(newest, record.get('sys_updated_on', ''))
+                    applied += 1
+                
+                self.watermarks[table] = newest
+                
+            except Exception as e:
+                logger.warning(f"⚠️ Ticket cache sync failed for {table}: {e}")
+        
+        self._evict_closed()
+        self.last_sync = time.time()
+        if applied:
+            logger.debug(f"Ticket cache applied {applied} updates ({len(self.tickets)} tickets cached)")
+        return applied
+    
+    def record(self, table: str, record: Dict):
+        """Upsert a ticket record (from a sync delta or a write response)"""
+        number = record.get('number')
+        if not number:
+            return
+        with self._lock:
+            cached = self.tickets.setdefault(number, {'table': table})
+            for field in self.SYNC_FIELDS.split(','):
+                if field in record:
+                    cached[field] = record[field]
+    
+    def _evict_closed(self):
+        """Drop tickets that were closed more than closed_ttl seconds ago"""
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=self.closed_ttl)).strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            expired = [number for number, ticket in self.tickets.items()
+                       if ticket.get('state') in self.CLOSED_STATES and ticket.get('sys_updated_on', '') < cutoff]
+            for number in expired:
+                del self.tickets[number]
+    
+    def snapshot_state(self) -> Dict:
+        """State for agent snapshots"""
+        with self._lock:
+            return {'tickets': dict(self.tickets), 'watermarks': dict(self.watermarks), 'filter_query': self.filter_query}
+    
+    def restore_state(self, state: Dict):
+        """Restore from an agent snapshot; the next sync only pulls deltas since the watermark"""
+        if state.get('filter_query', '') != self.filter_query:
+            logger.info("♻️ Ticket cache filter changed - resyncing from the lookback window")
+            return
+        with self._lock:
+            self.tickets.update(state.get('tickets', {}))
+            self.watermarks.update(state.get('watermarks', {}))
+    
+    def get(self, number: str) -> Optional[Dict]:
+        """Get cached ticket record"""
+        return self.tickets.get(number)
+    
+    def get_sys_id(self, number: str) -> Optional[str]:
+        """Resolve ticket number to sys_id from memory"""
+        cached = self.tickets.get(number)
+        return cached.get('sys_id') if cached else None
+    
+    def is_open(self, number: str) -> Optional[bool]:
+        """Open/closed state from memory (None if unknown)"""
+        cached = self.tickets.get(number)
+        if not cached or 'state' not in cached:
+            return None
+        return cached['state'] not in self.CLOSED_STATES
+    
+    def open_tickets(self, table: Optional[str] = None) -> List[Dict]:
+        """All cached tickets that are still open"""
+        with self._lock:
+            return [dict(ticket, number=number) for number, ticket in self.tickets.items()
+                    if ticket.get('state') not in self.CLOSED_STATES and (table is None or ticket['table'] == table)]
+    
+    def find_recent(self, text: str, max_age_seconds: int = 3600, table: str = 'incident') -> List[Dict]:
+        """Open tickets whose short description contains text, created within max_age_seconds"""
+        needle = text.lower()
+        current_time = datetime.now(timezone.utc)
+        matches = []
+        with self._lock:
+            for number, ticket in self.tickets.items():
+                if ticket['table'] != table or ticket.get('state') in self.CLOSED_STATES:
+                    continue
+                if needle not in ticket.get('short_description', '').lower():
+                    continue
+                created_time = parse_servicenow_time(ticket.get('sys_created_on', ''))
+                if created_time and (current_time - created_time).total_seconds() < max_age_seconds:
+                    matches.append(dict(ticket, number=number))
+        return matches
+
+class IncidentKnowledgeBase:
+    """Historical incidents/problems indexed for similarity lookup
+    
+    Tickets are embedded with a signed hashing vectorizer (words + bigrams), kept
+    as their strongest max_features weights in two flat arrays, and bucketed by
+    random-hyperplane LSH; a lookup probes the query's bucket and its one-bit
+    neighbours and scores only those candidates. Synced incrementally on
+    sys_updated_on by a background thread (refresh), so embedding never runs in
+    a monitoring cycle, and checkpointed to its own file at a long interval.
+    """
+    
+    TOKEN = re.compile(r'[a-z][a-z0-9_.\-]*')  # Numbers are dropped so values don't dominate
+    RESOLUTION_FIELDS = {'incident': 'close_code,close_notes', 'problem': 'cause_notes,fix_notes'}
+    BASE_FIELDS = 'sys_id,number,state,short_description,description,sys_created_on,sys_updated_on'
+    
+    def __init__(self, instance_url: str, headers: Dict, tables: tuple = ('incident', 'problem'),
+                 dimensions: int = 2048, bits: int = 12, hash_tables: int = 6, history_days: int = 90,
+                 max_entries: int = 5000, max_features: int = 32, min_sync_interval: int = 300, dedup_similarity: float = 0.85,
+                 checkpoint_path: Optional[str] = None, checkpoint_interval: int = 3600,
+                 session: Optional[requests.Session] = None, seed: int = 1):
+        self.instance_url = instance_url.rstrip('/')
+        self.headers = headers
+        self.session = session
+        self.tables = tables
+        self.dimensions = dimensions
+        self.max_features = max_features  # Features kept per vector; the rest barely move cosine scores
+        self.history_days = history_days
+        self.max_entries = max_entries
+        self.min_sync_interval = min_sync_interval
+        self.dedup_similarity = dedup_similarity
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        
+        # Fixed seed: the same planes after a restart, so snapshots stay valid
+        rng = random.Random(seed)
+        self.planes = [[array('f', (rng.gauss(0, 1) for _ in range(dimensions))) for _ in range(bits)]
+                       for _ in range(hash_tables)]
+        self.buckets = [{} for _ in range(hash_tables)]  # per hash table: signature -> set of numbers
+        
+        self.entries = {}      # number -> record (with 'table', 'resolution', 'vector', 'keys')
+        self._index_type = 'H' if dimensions <= 0xFFFF else 'I'
+        self.watermarks = {}   # table -> last seen sys_updated_on
+        self._ages = []        # heap of (sys_updated_on, number) for eviction; stale items skipped lazily
+        self.last_sync = 0.0
+        self.last_checkpoint = time.time()
+        self._dirty = False
+        self._syncing = False
+        self._lock = threading.Lock()
+        
+        if checkpoint_path:
+            self.load_checkpoint()
+    
+    def vectorize(self, text: str) -> Dict[int, float]:
+        """L2-normalized sparse hashed term vector, truncated to the max_features strongest weights
+        (ties keep the earliest features, so leading text wins)"""
+        tokens = self.TOKEN.findall(text.lower())
+        vector = {}
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            h = zlib.crc32(feature.encode())
+            index = h % self.dimensions
+            vector[index] = vector.get(index, 0.0) + (1.0 if h & 0x80000000 else -1.0)
+        kept = heapq.nlargest(self.max_features, ((index, weight) for index, weight in vector.items() if weight),
+                              key=lambda item: abs(item[1]))
+        norm = math.sqrt(sum(weight * weight for _, weight in kept))
+        return {index: weight / norm for index, weight in kept} if norm else {}
+    
+    def _pack(self, vector: Dict[int, float]) -> tuple:
+        """Compact (indices, weights) arrays for storage"""
+        return array(self._index_type, vector.keys()), array('f', vector.values())
+    
+    def _signatures(self, vector: Dict[int, float]) -> List[int]:
+        """One LSH signature per hash table"""
+        signatures = []
+        for planes in self.planes:
+            signature = 0
+            for bit, plane in enumerate(planes):
+                if sum(plane[index] * weight for index, weight in vector.items()) > 0:
+                    signature |= 1 << bit
+            signatures.append(signature)
+        return signatures
+    
+    def add(self, table: str, record: Dict):
+        """Upsert a ticket (re-indexed when its text changes)"""
+        number = record.get('number')
+        if not number:
+            return
+        
+        fields = self.RESOLUTION_FIELDS.get(table, '').split(',')
+        resolution = ' '.join(record[field] for field in fields if record.get(field)) or record.get('resolution', '')
+        description = record.get('description', '')[:1000]  # Leading text carries the signal
+        text = f"{record.get('short_description', '')} {description}"
+        text_hash = zlib.crc32(text.encode())  # Detects text changes without keeping the description
+        
+        with self._lock:
+            entry = self.entries.get(number)
+            if entry and entry['text_hash'] == text_hash:
+                entry.update(state=record.get('state', entry['state']), resolution=resolution or entry['resolution'],
+                             sys_updated_on=record.get('sys_updated_on', entry['sys_updated_on']))
+                heapq.heappush(self._ages, (entry['sys_updated_on'], number))
+                return
+            if entry:
+                self._unindex(number, entry)
+            
+            vector = self.vectorize(text)
+            keys = self._signatures(vector)
+            self.entries[number] = {
+                'table': table,
+                'short_description': record.get('short_description', ''),
+                'text_hash': text_hash,
+                'state': record.get('state', ''),
+                'resolution': resolution,
+                'sys_created_on': record.get('sys_created_on', ''),
+                'sys_updated_on': record.get('sys_updated_on', ''),
+                'vector': self._pack(vector),
+                'keys': array('I', keys)
+            }
+            for buckets, key in zip(self.buckets, keys):
+                buckets.setdefault(key, set()).add(number)
+            heapq.heappush(self._ages, (self.entries[number]['sys_updated_on'], number))
+            
+            # Evict the least recently updated tickets (heap items whose entry has changed are stale)
+            while len(self.entries) > self.max_entries:
+                updated_on, oldest = heapq.heappop(self._ages)
+                if oldest in self.entries and self.entries[oldest]['sys_updated_on'] == updated_on:
+                    self._unindex(oldest, self.entries.pop(oldest))
+            if len(self._ages) > 2 * len(self.entries) + 1000:
+                self._rebuild_ages()
+    
+    def _rebuild_ages(self):
+        """Rebuild the eviction heap without stale items (caller holds the lock)"""
+        self._ages = [(entry['sys_updated_on'], number) for number, entry in self.entries.items()]
+        heapq.heapify(self._ages)
+    
+    def _unindex(self, number: str, entry: Dict):
+        for buckets, key in zip(self.buckets, entry['keys']):
+            members = buckets.get(key)
+            if members:
+                members.discard(number)
+                if not members:
+                    del buckets[key]
+    
+    def query(self, text: str, k: int = 3, min_similarity: float = 0.3) -> List[Dict]:
+        """Top-k most similar indexed tickets (cosine similarity, best first)"""
+        vector = self.vectorize(text)
+        if not vector:
+            return []
+        
+        keys = self._signatures(vector)
+        with self._lock:
+            candidates = set()
+            for buckets, key in zip(self.buckets, keys):
+                for probe in [key] + [key ^ (1 << bit) for bit in range(len(self.planes[0]))]:
+                    candidates.update(buckets.get(probe, ()))
+            
+            scored = []
+            for number in candidates:
+                entry = self.entries[number]
+                similarity = sum(weight * vector.get(index, 0.0) for index, weight in zip(*entry['vector']))
+                if similarity >= min_similarity:
+                    scored.append((similarity, number, entry))
+        
+        return [
+            {
+                'number': number,
+                'table': entry['table'],
+                'short_description': entry['short_description'],
+                'state': entry['state'],
+                'resolution': entry['resolution'],
+                'sys_created_on': entry['sys_created_on'],
+                'similarity': round(similarity, 3)
+            }
+            for similarity, number, entry in heapq.nlargest(k, scored, key=lambda item: item[0])
+        ]
+    
+    def sync(self, force: bool = False) -> int:
+        """Pull tickets updated since the watermark (history_days back on first sync)"""
+        if not force and time.time() - self.last_sync < self.min_sync_interval:
+            return 0
+        
+        applied = 0
+        for table in self.tables:
+            watermark = self.watermarks.get(table)
+            if not watermark:
+                start = datetime.now(timezone.utc) - timedelta(days=self.history_days)
+                watermark = start.strftime('%Y-%m-%d %H:%M:%S')
+            
+            newest = watermark
+            try:
+                fields = ','.join(filter(None, (self.BASE_FIELDS, self.RESOLUTION_FIELDS.get(table))))
+                records = iter_table_records(
+                    self.instance_url, self.headers, table,
+                    query=f"sys_updated_on>={watermark}^ORDERBYsys_updated_on",
+                    fields=fields, page_size=500, session=self.session
+                )
+                for record in records:
+                    self.add(table, record)
+                    newest = max(newest, record.get('sys_updated_on', ''))
+                    applied += 1
+                
+                self.watermarks[table] = newest
+                
+            except Exception as e:
+                logger.warning(f"⚠️ Knowledge base sync failed for {table}: {e}")
+        
+        self.last_sync = time.time()
+        if applied:
+            self._dirty = True
+            logger.debug(f"Knowledge base applied {applied} updates ({len(self.entries)} tickets indexed)")
+        return applied
+    
+    def refresh(self) -> bool:
+        """Start a background sync if one is due; lookups keep using the current index meanwhile"""
+        with self._lock:
+            if self._syncing or time.time() - self.last_sync < self.min_sync_interval:
+                return False
+            self._syncing = True
+        threading.Thread(target=self._background_sync, name='knowledge-base-sync', daemon=True).start()
+        return True
+    
+    def _background_sync(self):
+        try:
+            started = time.perf_counter()
+            applied = self.sync(force=True)
+            if applied:
+                logger.info(f"📚 Knowledge base indexed {applied} ticket updates in {time.perf_counter() - started:.1f}s "
+                            f"({len(self.entries)} tickets)")
+            self.maybe_checkpoint()
+        except Exception as e:
+            logger.warning(f"⚠️ Knowledge base background sync failed: {e}")
+        finally:
+            self._syncing = False
+    
+    def maybe_checkpoint(self):
+        """Checkpoint if the index changed and the checkpoint interval has elapsed"""
+        if self.checkpoint_path and self._dirty and time.time() - self.last_checkpoint >= self.checkpoint_interval:
+            self.save_checkpoint()
+    
+    def save_checkpoint(self):
+        """Write the index to disk atomically"""
+        if not self.checkpoint_path:
+            return
+        try:
+            payload = dict(self.snapshot_state(), version=2)
+            temp_path = f"{self.checkpoint_path}.tmp"
+            with open(temp_path, 'wb') as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.checkpoint_path)
+            self.last_checkpoint = time.time()
+            self._dirty = False
+        except Exception as e:
+            logger.warning(f"⚠️ Knowledge base checkpoint failed: {e}")
+    
+    def load_checkpoint(self):
+        """Warm-start the index from disk; the next sync only pulls deltas since the watermarks"""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return
+        try:
+            with open(self.checkpoint_path, 'rb') as f:
+                data = pickle.load(f)
+            if data.get('version') != 2:
+                logger.warning("⚠️ Knowledge base checkpoint format mismatch - starting cold")
+                return
+            self.restore_state(data)
+            logger.info(f"📚 Restored knowledge base with {len(self.entries)} tickets")
+        except Exception as e:
+            logger.warning(f"⚠️ Knowledge base checkpoint load failed: {e}")
+    
+    def snapshot_state(self) -> Dict:
+        """State for checkpoints (vectors and signatures included, so restore skips re-embedding)"""
+        with self._lock:
+            return {'entries': dict(self.entries), 'watermarks': dict(self.watermarks),
+                    'shape': (self.dimensions, len(self.planes), len(self.planes[0]), self.max_features)}
+    
+    def restore_state(self, state: Dict):
+        """Restore from a checkpoint and rebuild the buckets"""
+        if state.get('shape') != (self.dimensions, len(self.planes), len(self.planes[0]), self.max_features):
+            # Stored vectors are truncated, so they can't be re-embedded; resync from scratch instead
+            logger.warning("⚠️ Knowledge base checkpoint was built with different settings - starting cold")
+            return
+        for number, entry in state.get('entries', {}).items():
+            with self._lock:
+                self.entries[number] = entry
+                for buckets, key in zip(self.buckets, entry['keys']):
+                    buckets.setdefault(key, set()).add(number)
+        with self._lock:
+            self._rebuild_ages()
+        self.watermarks.update(state.get('watermarks', {}))
+
+class RateLimitedSession(requests.Session):
+    """Pooled HTTP session with a token-bucket request rate limit"""
+    
+    def __init__(self, rate_per_second: float = 5.0, burst: int = 10, pool_size: int = 10):
+        super().__init__()
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last_refill = time.monotonic()
+        self._bucket_lock = threading.Lock()
+        
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+    
+    def request(self, *args, **kwargs):
+        self._acquire()
+        return super().request(*args, **kwargs)
+    
+    def _acquire(self):
+        """Block until a request token is available"""
+        while True:
+            with self._bucket_lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.last_refill) * self.rate_per_second)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate_per_second
+            time.sleep(wait)
+
 class ServiceNowClient:
     """ServiceNow API client with proper authentication"""
     
-    def __init__(self, instance_url: str, username: str, password: str):
+    WORK_NOTES_TEMPLATE = ("Created by AI agent at {created_at}\n\nTechnical Details:\n{technical_details}"
+                           "\n\nRecommended Actions:\n{recommended_actions}")
+    
+    def __init__(self, instance_url: str, username: str, password: str,
+                 session: Optional[requests.Session] = None):
         self.instance_url = instance_url.rstrip('/')
         self.username = username
         self.password = password
+        self.session = session or requests.Session()  # Pooled keep-alive connections
         
         # Setup authentication
         auth_string = f"{username}:{password}"
@@ -43,6 +618,11 @@ class ServiceNowClient:
             'Content-Type': 'application/json',
             'Accept': 'application/json'
         }
+        
+        # Only the agent's own tickets (created by the integration user) are cached
+        self.ticket_cache = TicketStateCache(self.instance_url, self.headers, filter_query=f"sys_created_by={username}",
+                                             session=self.session)
+        self.work_notes_template = TicketTemplate(self.WORK_NOTES_TEMPLATE)
     
     def test_connection(self) -> bool:
         """Test ServiceNow connection"""
@@ -51,7 +631,7 @@ class ServiceNowClient:
             url = f"{self.instance_url}/api/now/table/sys_user"
             params = {'sysparm_limit': 1, 'sysparm_fields': 'sys_id,name'}
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+            response = self.session.get(url, headers=self.headers, params=params, timeout=30)
             
             if response.status_code == 200:
                 logger.info("✅ ServiceNow connection successful")
@@ -79,14 +659,19 @@ class ServiceNowClient:
                 'subcategory': 'Monitoring',
                 'state': '1',  # New
                 'caller_id': self.username,
-                'work_notes': f"Created by AI agent at {datetime.now(timezone.utc).isoformat()}\n\nTechnical Details:\n{data.get('technical_details', 'N/A')}\n\nRecommended Actions:\n{data.get('recommended_actions', 'Investigate and resolve')}"
+                'work_notes': self._work_notes(data)
             }
+            if data.get('problem_id'):
+                incident_data['problem_id'] = data['problem_id']  # Parent problem of a correlated group
+            if data.get('correlation_id'):
+                incident_data['correlation_id'] = data['correlation_id']  # Agent marker + hosts, for re-adoption
             
             url = f"{self.instance_url}/api/now/table/incident"
-            response = requests.post(url, headers=self.headers, json=incident_data, timeout=30)
+            response = self.session.post(url, headers=self.headers, json=incident_data, timeout=30)
             response.raise_for_status()
             
             result = response.json()['result']
+            self.ticket_cache.record('incident', result)
             return {
                 'number': result.get('number'),
                 'sys_id': result.get('sys_id'),
@@ -97,24 +682,71 @@ class ServiceNowClient:
             logger.error(f"Failed to create incident: {e}")
             return None
     
-    def search_incidents(self, query: str, limit: int = 5) -> List[Dict]:
-        """Search for existing incidents"""
+    def create_problem(self, data: Dict) -> Optional[Dict]:
+        """Create problem ticket"""
         try:
-            url = f"{self.instance_url}/api/now/table/incident"
-            params = {
-                'sysparm_query': query,
-                'sysparm_limit': limit,
-                'sysparm_fields': 'number,short_description,state,sys_created_on'
+            problem_data = {
+                'short_description': data.get('title', 'AI Detected Infrastructure Problem'),
+                'description': data.get('description', 'Automated problem from AI monitoring'),
+                'urgency': self._map_priority(data.get('urgency', 'medium')),
+                'impact': self._map_priority(data.get('impact', 'medium')),
+                'category': 'Infrastructure',
+                'subcategory': 'Monitoring',
+                'state': '1',  # New
+                'work_notes': self._work_notes(data)
             }
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
+            url = f"{self.instance_url}/api/now/table/problem"
+            response = self.session.post(url, headers=self.headers, json=problem_data, timeout=30)
             response.raise_for_status()
             
-            return response.json().get('result', [])
+            result = response.json()['result']
+            self.ticket_cache.record('problem', result)
+            return {
+                'number': result.get('number'),
+                'sys_id': result.get('sys_id'),
+                'status': 'created'
+            }
             
         except Exception as e:
-            logger.error(f"Failed to search incidents: {e}")
-            return []
+            logger.error(f"Failed to create problem: {e}")
+            return None
+    
+    def set_credentials(self, username: str, password: str):
+        """Rotate the password in place (headers are shared with the ticket cache)
+        
+        The username can't change: the ticket cache filter and ticket ownership checks are keyed on it.
+        """
+        if username != self.username:
+            raise ValueError(f"ServiceNow user can't change from {self.username} to {username} while running")
+        auth_b64 = base64.b64encode(f"{username}:{password}".encode('ascii')).decode('ascii')
+        self.username = username
+        self.password = password
+        self.headers['Authorization'] = f'Basic {auth_b64}'
+    
+    def _work_notes(self, data: Dict) -> str:
+        """Render creation work notes"""
+        return self.work_notes_template.render({
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'technical_details': data.get('technical_details', 'N/A'),
+            'recommended_actions': data.get('recommended_actions', 'Investigate and resolve')
+        })
+    
+    def update_ticket(self, table: str, sys_id: str, updates: Dict) -> Optional[Dict]:
+        """Update ticket in place (PATCH)"""
+        try:
+            url = f"{self.instance_url}/api/now/table/{table}/{sys_id}"
+            params = {'sysparm_fields': TicketStateCache.SYNC_FIELDS}
+            response = self.session.patch(url, headers=self.headers, params=params, json=updates, timeout=30)
+            response.raise_for_status()
+            
+            result = response.json()['result']
+            self.ticket_cache.record(table, result)
+            return result
+            
+        except Exception as e:
+            logger.error(f"Failed to update {table} {sys_id}: {e}")
+            return None
     
     def _map_priority(self, priority: str) -> str:
         """Map priority to ServiceNow values"""
@@ -126,13 +758,102 @@ class ServiceNowClient:
         }
         return mapping.get(priority.lower(), '2')
 
+class SeriesStreamDecoder:
+    """Incremental decoder for metrics query (/api/v1/query) response bodies
+    
+    Feed raw body chunks as they arrive. Pointlists go straight into per-series
+    array('d') buffers (times, values), so no nested per-point lists are built;
+    the rest of the body is small and is parsed with json once complete.
+    """
+    
+    POINTLIST = re.compile(rb'"pointlist"\s*:\s*\[')
+    POINTLIST_END = re.compile(rb'\]\s*\]')
+    SEPARATORS = bytes.maketrans(b'[],', b'   ')
+    
+    def __init__(self):
+        self.skeleton = bytearray()  # Body with every pointlist emptied
+        self.pending = b''
+        self.in_points = False
+        self.times = []   # one array('d') per series, in body order
+        self.values = []
+    
+    def feed(self, chunk: bytes):
+        """Consume the next body chunk"""
+        data = self.pending + chunk
+        self.pending = b''
+        
+        while data:
+            if not self.in_points:
+                match = self.POINTLIST.search(data)
+                if not match:
+                    # Keep a tail in case a "pointlist" key straddles the chunk boundary
+                    keep = min(len(data), 32)
+                    self.skeleton += data[:len(data) - keep]
+                    self.pending = data[len(data) - keep:]
+                    return
+                self.skeleton += data[:match.end()] + b']'
+                self.times.append(array('d'))
+                self.values.append(array('d'))
+                self.in_points = True
+                data = data[match.end():]
+                continue
+            
+            stripped = data.lstrip()
+            if stripped[:1] == b']':
+                # Outer close straight after the previous pair (or an empty pointlist)
+                self.in_points = False
+                data = stripped[1:]
+                continue
+            
+            end = self.POINTLIST_END.search(data)
+            if end:
+                self._parse_pairs(data[:end.start() + 1])
+                self.in_points = False
+                data = data[end.end():]
+                continue
+            
+            last = data.rfind(b']')
+            if last < 0:
+                self.pending = data
+                return
+            self._parse_pairs(data[:last + 1])
+            data = data[last + 1:]
+    
+    def _parse_pairs(self, region: bytes):
+        """Append complete [timestamp, value] pairs (null values become NaN)"""
+        numbers = array('d', map(float, region.translate(self.SEPARATORS).replace(b'null', b'nan').split()))
+        self.times[-1].extend(numbers[0::2])
+        self.values[-1].extend(numbers[1::2])
+    
+    def close(self) -> Dict:
+        """Finish decoding; each series gets 'times' and 'values' arrays instead of 'pointlist'"""
+        self.skeleton += self.pending
+        self.pending = b''
+        data = json.loads(bytes(self.skeleton))
+        
+        for serie, times, values in zip(data.get('series') or [], self.times, self.values):
+            del serie['pointlist']
+            serie['times'] = times
+            serie['values'] = values
+        return data
+    
+    @classmethod
+    def decode_response(cls, response: requests.Response, chunk_size: int = 65536) -> Dict:
+        """Decode a streamed (stream=True) response"""
+        decoder = cls()
+        for chunk in response.iter_content(chunk_size):
+            decoder.feed(chunk)
+        return decoder.close()
+
 class DatadogClient:
     """Datadog API client"""
     
-    def __init__(self, api_key: str, app_key: str, site: str = "datadoghq.com"):
+    def __init__(self, api_key: str, app_key: str, site: str = "datadoghq.com",
+                 session: Optional[requests.Session] = None):
         self.api_key = api_key
         self.app_key = app_key
         self.site = site
+        self.session = session or requests.Session()  # Pooled keep-alive connections
         self.base_url = f"https://api.{site}"
         self.headers = {
             'DD-API-KEY': api_key,
@@ -140,6 +861,13 @@ class DatadogClient:
             'Content-Type': 'application/json'
         }
     
+    def set_keys(self, api_key: str, app_key: str):
+        """Rotate API keys in place"""
+        self.api_key = api_key
+        self.app_key = app_key
+        self.headers['DD-API-KEY'] = api_key
+        self.headers['DD-APPLICATION-KEY'] = app_key
+    
     def get_metric(self, metric: str, minutes_back: int = 15) -> Optional[float]:
         """Get latest metric value"""
         try:
@@ -153,14 +881,14 @@ class DatadogClient:
                 'to': int(current_time.timestamp())
             }
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=15)
-            response.raise_for_status()
-            
-            data = response.json()
+            with self.session.get(url, headers=self.headers, params=params, timeout=15, stream=True) as response:
+                response.raise_for_status()
+                data = SeriesStreamDecoder.decode_response(response)
             series = data.get('series', [])
             
-            if series and series[0].get('pointlist'):
-                return series[0]['pointlist'][-1][1]  # Latest value
+            if series and series[0]['values']:
+                value = series[0]['values'][-1]  # Latest value
+                return None if math.isnan(value) else value
             
             return None
             
@@ -168,10 +896,272 @@ class DatadogClient:
             logger.error(f"Error getting metric {metric}: {e}")
             return None
 
+class BaselineEngine:
+    """Incremental per-series baselines (EWMA, Welford variance, hour-of-day buckets)
+    
+    Each series is a fixed-size array of doubles, so memory is O(1) per series
+    and every update is O(1).
+    """
+    
+    # Series layout: count, mean, M2, EWMA, EW variance, then per-hour EWMA means and counts
+    N, MEAN, M2, EWMA, EWVAR = range(5)
+    BUCKETS = 24
+    BUCKET_MEAN = 5
+    BUCKET_COUNT = BUCKET_MEAN + BUCKETS
+    SIZE = BUCKET_COUNT + BUCKETS
+    
+    # Direction that counts as "bad" per metric (+1 high, -1 low, 0 both)
+    DIRECTIONS = {
+        'system.cpu.user': 1,
+        'system.mem.pct_usable': -1,
+        'system.disk.in_use': 1,
+        'system.load.1': 1
+    }
+    
+    # Smallest move worth flagging, in the metric's own units (disk is a 0-1 fraction); a
+    # near-constant series otherwise has ~0 variance and any wobble scores a huge z
+    MIN_DELTA = {
+        'system.cpu.user': 10.0,
+        'system.mem.pct_usable': 10.0,
+        'system.disk.in_use': 0.05,
+        'system.load.1': 1.0
+    }
+    
+    def __init__(self, z_threshold: float = 4.0, alpha: float = 0.1, warmup: int = 30,
+                 bucket_warmup: int = 5, relative_std_floor: float = 0.02, checkpoint_path: Optional[str] = None, checkpoint_interval: int = 300):
+        self.z_threshold = z_threshold
+        self.alpha = alpha                  # EWMA smoothing factor
+        self.warmup = warmup                # Points before a series can flag deviations
+        self.bucket_warmup = bucket_warmup  # Points before a seasonal bucket is trusted
+        self.relative_std_floor = relative_std_floor  # Std never below this fraction of |expected|
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        
+        self.series = {}  # "host|metric" -> array('d') of SIZE
+        self.last_checkpoint = time.time()
+        self._lock = threading.Lock()
+        
+        if checkpoint_path:
+            self.load_checkpoint()
+    
+    def observe(self, host: str, metrics: Dict, timestamp: Optional[float] = None) -> List[Dict]:
+        """Score each value against its baseline, then fold it in; returns deviations"""
+        timestamp = timestamp or time.time()
+        hour = datetime.fromtimestamp(timestamp, timezone.utc).hour
+        deviations = []
+        
+        with self._lock:
+            for metric, value in metrics.items():
+                if not isinstance(value, (int, float)):
+                    continue
+                key = f"{host}|{metric}"
+                state = self.series.get(key)
+                if state is None:
+                    state = self.series[key] = array('d', bytes(8 * self.SIZE))
+                
+                deviation = self._score(state, metric, float(value), hour)
+                if deviation:
+                    deviation.update(host=host, metric=metric)
+                    deviations.append(deviation)
+                
+                self._update(state, float(value), hour)
+        
+        return deviations
+    
+    def _score(self, state: array, metric: str, value: float, hour: int) -> Optional[Dict]:
+        """Compare a value to the seasonal bucket (or overall EWMA) baseline"""
+        if state[self.N] < self.warmup:
+            return None
+        
+        if state[self.BUCKET_COUNT + hour] >= self.bucket_warmup:
+            expected = state[self.BUCKET_MEAN + hour]
+        else:
+            expected = state[self.EWMA]
+        
+        min_delta = self.MIN_DELTA.get(metric, 0.0)
+        if abs(value - expected) < min_delta:
+            return None
+        
+        std = max(math.sqrt(max(state[self.EWVAR], state[self.M2] / max(state[self.N] - 1, 1))),
+                  self.relative_std_floor * abs(expected), min_delta / self.z_threshold, 1e-9)
+        z_score = (value - expected) / std
+        direction = self.DIRECTIONS.get(metric, 0)
+        if (direction > 0 and z_score < self.z_threshold) or \
+           (direction < 0 and z_score > -self.z_threshold) or \
+           (direction == 0 and abs(z_score) < self.z_threshold):
+            return None
+        
+        sign = 1 if z_score > 0 else -1
+        return {
+            'value': value,
+            'expected': expected,
+            'band': expected + sign * self.z_threshold * std,
+            'z_score': z_score
+        }
+    
+    def _update(self, state: array, value: float, hour: int):
+        """O(1) update of all running statistics"""
+        # Welford
+        state[self.N] += 1
+        delta = value - state[self.MEAN]
+        state[self.MEAN] += delta / state[self.N]
+        state[self.M2] += delta * (value - state[self.MEAN])
+        
+        # Exponentially weighted mean / variance
+        if state[self.N] == 1:
+            state[self.EWMA] = value
+        else:
+            diff = value - state[self.EWMA]
+            increment = self.alpha * diff
+            state[self.EWMA] += increment
+            state[self.EWVAR] = (1 - self.alpha) * (state[self.EWVAR] + diff * increment)
+        
+        # Hour-of-day bucket
+        if state[self.BUCKET_COUNT + hour] == 0:
+            state[self.BUCKET_MEAN + hour] = value
+        else:
+            state[self.BUCKET_MEAN + hour] += self.alpha * (value - state[self.BUCKET_MEAN + hour])
+        state[self.BUCKET_COUNT + hour] += 1
+    
+    def snapshot_state(self) -> Dict:
+        """State for agent snapshots"""
+        with self._lock:
+            return {'size': self.SIZE, 'series': {key: state.tobytes() for key, state in self.series.items()}}
+    
+    def restore_state(self, state: Dict):
+        """Restore from an agent snapshot"""
+        if state.get('size') != self.SIZE:
+            logger.warning("⚠️ Baseline state format mismatch - starting cold")
+            return
+        with self._lock:
+            for key, raw in state['series'].items():
+                series = array('d')
+                series.frombytes(raw)
+                self.series[key] = series
+    
+    def maybe_checkpoint(self):
+        """Checkpoint if the checkpoint interval has elapsed"""
+        if self.checkpoint_path and time.time() - self.last_checkpoint >= self.checkpoint_interval:
+            self.save_checkpoint()
+    
+    def save_checkpoint(self):
+        """Write all series state to disk atomically"""
+        if not self.checkpoint_path:
+            return
+        try:
+            payload = dict(self.snapshot_state(), version=1)
+            temp_path = f"{self.checkpoint_path}.tmp"
+            with open(temp_path, 'wb') as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.checkpoint_path)
+            self.last_checkpoint = time.time()
+        except Exception as e:
+            logger.warning(f"⚠️ Baseline checkpoint failed: {e}")
+    
+    def load_checkpoint(self):
+        """Warm-start series state from disk"""
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return
+        try:
+            with open(self.checkpoint_path, 'rb') as f:
+                data = pickle.load(f)
+            if data.get('version') != 1:
+                logger.warning("⚠️ Baseline checkpoint format mismatch - starting cold")
+                return
+            self.restore_state(data)
+            logger.info(f"📈 Restored baselines for {len(self.series)} series")
+        except Exception as e:
+            logger.warning(f"⚠️ Baseline checkpoint load failed: {e}")
+
+class LocalMetricsCollector:
+    """Read host metrics locally (procfs, or psutil when installed) instead of the Datadog query API
+    
+    Values use the same units as the Datadog metrics the analyzer expects.
+    """
+    
+    SUPPORTED_METRICS = ('system.cpu.user', 'system.mem.pct_usable', 'system.disk.in_use', 'system.load.1')
+    
+    def __init__(self, disk_path: str = '/', proc_root: str = '/proc'):
+        self.disk_path = disk_path
+        self.proc_root = proc_root
+        self.hostname = socket.gethostname()
+        self._last_cpu = None  # (user, total) CPU time from the previous sample
+    
+    @classmethod
+    def available(cls, proc_root: str = '/proc') -> bool:
+        """Whether this host can be sampled locally"""
+        return PSUTIL_AVAILABLE or os.path.exists(os.path.join(proc_root, 'stat'))
+    
+    def get_metric(self, metric: str) -> Optional[float]:
+        """Current value of a supported metric, or None"""
+        try:
+            if metric == 'system.cpu.user':
+                return self._cpu_user()
+            if metric == 'system.mem.pct_usable':
+                return self._mem_pct_usable()
+            if metric == 'system.disk.in_use':
+                usage = os.statvfs(self.disk_path)
+                used = usage.f_blocks - usage.f_bfree
+                return used / (used + usage.f_bavail) if used + usage.f_bavail else 0.0
+            if metric == 'system.load.1':
+                return os.getloadavg()[0]
+        except Exception as e:
+            logger.warning(f"⚠️ Local collection of {metric} failed: {e}")
+        return None
+    
+    def _cpu_user(self) -> float:
+        """User CPU % since the previous sample (or over a short window on first use)"""
+        current = self._read_cpu_times()
+        if self._last_cpu is None:
+            time.sleep(0.1)
+            self._last_cpu, current = current, self._read_cpu_times()
+        
+        user_delta = current[0] - self._last_cpu[0]
+        total_delta = current[1] - self._last_cpu[1]
+        self._last_cpu = current
+        return 100.0 * user_delta / total_delta if total_delta > 0 else 0.0
+    
+    def _read_cpu_times(self) -> tuple:
+        """(user, total) CPU time: psutil seconds, or jiffies from the aggregate cpu line of /proc/stat"""
+        if PSUTIL_AVAILABLE:
+            times = psutil.cpu_times()
+            # guest / guest_nice (Linux) are already counted in user / nice
+            return times.user, sum(times) - getattr(times, 'guest', 0) - getattr(times, 'guest_nice', 0)
+        
+        with open(os.path.join(self.proc_root, 'stat')) as f:
+            fields = [int(value) for value in f.readline().split()[1:]]
+        # user nice system idle iowait irq softirq steal [guest guest_nice are already in user/nice]
+        return fields[0], sum(fields[:8])
+    
+    def _mem_pct_usable(self) -> float:
+        """Available memory as % of total"""
+        if PSUTIL_AVAILABLE:
+            memory = psutil.virtual_memory()
+            return 100.0 * memory.available / memory.total
+        
+        meminfo = {}
+        with open(os.path.join(self.proc_root, 'meminfo')) as f:
+            for line in f:
+                name, value = line.split(':', 1)
+                meminfo[name] = int(value.split()[0])
+        return 100.0 * meminfo['MemAvailable'] / meminfo['MemTotal']
+
 class InfrastructureAnalyzer:
     """Analyze infrastructure metrics with proper thresholds"""
     
-    def __init__(self):
+    METRIC_NAMES = {
+        'system.cpu.user': 'CPU Usage',
+        'system.mem.pct_usable': 'Memory Available',
+        'system.disk.in_use': 'Disk Usage',
+        'system.load.1': 'System Load'
+    }
+    
+    # Baseline values are reported in the same units as the static checks (disk as a percentage)
+    DISPLAY_SCALE = {'system.disk.in_use': 100}
+    
+    def __init__(self, baseline: Optional[BaselineEngine] = None):
+        self.baseline = baseline  # Optional anomaly detection alongside static thresholds
+        
         # Define thresholds properly
         self.thresholds = {
             'cpu_high': 85.0,           # CPU % above this is high
@@ -180,7 +1170,7 @@ class InfrastructureAnalyzer:
             'load_high': 5.0            # Load average above this is high
         }
     
-    def analyze_metrics(self, metrics: Dict) -> Dict:
+    def analyze_metrics(self, metrics: Dict, host: str = '*') -> Dict:
         """Analyze metrics and identify issues"""
         issues = []
         
@@ -237,6 +1227,33 @@ class InfrastructureAnalyzer:
                 'actions': 'Identify resource-intensive processes, scale resources, load balancing'
             })
         
+        # Baseline deviations for metrics that did not breach a static threshold
+        if self.baseline:
+            breached = {issue['metric'] for issue in issues}
+            for deviation in self.baseline.observe(host, metrics):
+                name = self.METRIC_NAMES.get(deviation['metric'], deviation['metric'])
+                if name in breached or (name == 'Memory Available' and 'Memory Usage' in breached):
+                    continue
+                severity = 'high' if abs(deviation['z_score']) >= 2 * self.baseline.z_threshold else 'medium'
+                scale = self.DISPLAY_SCALE.get(deviation['metric'], 1)
+                issues.append({
+                    'metric': f"{name} Anomaly",
+                    'current_value': deviation['value'] * scale,
+                    'threshold': round(deviation['band'] * scale, 2),
+                    'severity': severity,
+                    'detector': 'baseline',
+                    'description': f"{name} at {deviation['value'] * scale:.2f} deviates from baseline "
+                                   f"{deviation['expected'] * scale:.2f} (z-score {deviation['z_score']:.1f})",
+                    'impact': 'Unusual behaviour for this host - possible early sign of degradation',
+                    'actions': 'Compare with recent deploys and traffic changes, check for runaway processes'
+                })
+        
+        # Tag issues with their scope so concurrent breaches can be correlated
+        detected_at = time.time()
+        for issue in issues:
+            issue['host'] = host
+            issue['detected_at'] = detected_at
+        
         return {
             'issues_found': len(issues) > 0,
             'issue_count': len(issues),
@@ -254,157 +1271,1781 @@ class InfrastructureAnalyzer:
         highest = max(issues, key=lambda x: severity_order.get(x.get('severity', 'low'), 1))
         return highest.get('severity', 'medium')
 
-class ITSMAgent:
-    """Complete ITSM Agent with AI analysis"""
+class IncidentCorrelator:
+    """Group concurrent issues by host and time window"""
     
-    def __init__(self, servicenow_url: str, servicenow_user: str, servicenow_password: str,
-                 datadog_api_key: str, datadog_app_key: str, datadog_site: str = "datadoghq.com",
-                 openai_api_key: str = None, monitoring_interval: int = 600):
+    def __init__(self, window_seconds: int = 300, problem_threshold: int = 3):
+        self.window_seconds = window_seconds      # Issues this close in time can correlate
+        self.problem_threshold = problem_threshold  # Group size that also gets a parent problem ticket
+    
+    def correlate(self, issues: List[Dict]) -> List[Dict]:
+        """Return correlated groups of issues, most severe first"""
+        if not issues:
+            return []
         
-        self.servicenow = ServiceNowClient(servicenow_url, servicenow_user, servicenow_password)
-        self.datadog = DatadogClient(datadog_api_key, datadog_app_key, datadog_site)
-        self.analyzer = InfrastructureAnalyzer()
-        self.monitoring_interval = monitoring_interval
+        # Union-find over issue indices
+        parent = list(range(len(issues)))
         
-        # Initialize OpenAI if available and key provided
-        self.llm = None
-        if openai_api_key and LANGCHAIN_AVAILABLE:
-            try:
-                self.llm = ChatOpenAI(
-                    temperature=0.1,
-                    model="gpt-4",
-                    api_key=openai_api_key
-                )
-                logger.info("✅ OpenAI GPT-4 initialized for enhanced analysis")
-            except Exception as e:
-                logger.warning(f"⚠️ OpenAI initialization failed: {e}")
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        
+        def union(a: int, b: int):
+            root_a, root_b = find(a), find(b)
+            if root_a != root_b:
+                parent[root_b] = root_a
+        
+        # Sweep issues in time order; each host remembers the last issue that
+        # touched it, so linking is O(1) per issue instead of pairwise
+        order = sorted(range(len(issues)), key=lambda i: issues[i].get('detected_at', 0))
+        last_seen = {}  # host -> (detected_at, index)
+        
+        for index in order:
+            issue = issues[index]
+            detected_at = issue.get('detected_at', 0)
+            host = issue.get('host', '*')
+            
+            previous = last_seen.get(host)
+            if previous and detected_at - previous[0] <= self.window_seconds:
+                union(previous[1], index)
+            last_seen[host] = (detected_at, index)
+        
+        # Collect components
+        components = {}
+        for index in order:
+            components.setdefault(find(index), []).append(issues[index])
+        
+        severity_order = {'critical': 4, 'high': 3, 'medium': 2, 'low': 1}
+        groups = []
+        for members in components.values():
+            members.sort(key=lambda x: severity_order.get(x.get('severity', 'low'), 1), reverse=True)
+            hosts = sorted({member.get('host', '*') for member in members})
+            groups.append({
+                'issues': members,
+                'hosts': hosts,
+                'severity': members[0].get('severity', 'medium'),
+                'ticket_type': 'problem' if len(members) >= self.problem_threshold else 'incident'
+            })
+        
+        groups.sort(key=lambda g: severity_order.get(g['severity'], 1), reverse=True)
+        return groups
+
+class TicketLifecycleManager:
+    """Update open tickets in place on repeat breaches and resolve them on recovery"""
     
-    def collect_metrics(self) -> Dict:
-        """Collect current metrics from Datadog"""
-        metrics = {
-            'system.cpu.user': self.datadog.get_metric('system.cpu.user') or 0,
-            'system.mem.pct_usable': self.datadog.get_metric('system.mem.pct_usable') or 100,
-            'system.disk.in_use': self.datadog.get_metric('system.disk.in_use') or 0,
-            'system.load.1': self.datadog.get_metric('system.load.1') or 0
-        }
-        return metrics
+    SEVERITY_ORDER = {'critical': 4, 'high': 3, 'medium': 2, 'low': 1}
+    CORRELATION_PREFIX = 'itsm-agent:'
     
-    def enhance_analysis_with_ai(self, analysis: Dict) -> Dict:
-        """Enhance analysis with AI insights"""
-        if not self.llm or not analysis.get('issues_found'):
-            return analysis
+    def __init__(self, servicenow: ServiceNowClient, healthy_period: int = 1800, update_every: int = 3,
+                 close_code: str = 'Solved (Permanently)'):
+        self.servicenow = servicenow
+        self.healthy_period = healthy_period  # Seconds of healthy metrics before auto-resolve
+        self.update_every = update_every      # Cycles coalesced into one work-note update
+        self.close_code = close_code
+        
+        self.tickets = {}    # ticket number -> lifecycle entry
+        self.key_index = {}  # issue key -> ticket number
+    
+    @staticmethod
+    def issue_key(issue: Dict) -> str:
+        """Stable identity of a breach (host + metric)"""
+        return f"{issue.get('host', '*')}|{issue['metric']}"
+    
+    @classmethod
+    def correlation_id(cls, hosts: List[str]) -> str:
+        """correlation_id for agent-filed incidents (ServiceNow limits it to 100 characters)"""
+        return f"{cls.CORRELATION_PREFIX}{','.join(hosts)}"[:100]
+    
+    def track(self, ticket: Dict, issues: List[Dict], table: str = 'incident'):
+        """Start tracking a newly filed ticket"""
+        entry = {
+            'number': ticket['number'],
+            'sys_id': ticket['sys_id'],
+            'table': table,
+            'keys': set(),
+            'severity': 'low',
+            'pending': [],
+            'last_breach': time.time(),
+            'problem': ticket.get('problem')  # Linked parent problem, if any
+        }
+        self.tickets[ticket['number']] = entry
+        for issue in issues:
+            self._attach(entry, issue)
+    
+    def absorb(self, issues: List[Dict]) -> List[Dict]:
+        """Queue updates for issues covered by an open ticket; return the rest"""
+        remaining = []
+        
+        for issue in issues:
+            number = self.key_index.get(self.issue_key(issue))
+            
+            # Ticket closed outside the agent - stop tracking it
+            if number and self.servicenow.ticket_cache.is_open(number) is False:
+                self._forget(number)
+                number = None
+            
+            if not number:
+                number = self._adopt_open_ticket(issue)
+            
+            if not number:
+                remaining.append(issue)
+                continue
+            
+            entry = self.tickets[number]
+            entry['pending'].append({
+                'metric': issue['metric'],
+                'value': issue['current_value'],
+                'severity': issue['severity'],
+                'detected_at': issue.get('detected_at', time.time())
+            })
+            entry['last_breach'] = time.time()
+        
+        return remaining
+    
+    def process_cycle(self, analysis: Dict) -> Dict:
+        """Flush coalesced updates and resolve recovered tickets"""
+        now = time.time()
+        stats = {'updated': 0, 'resolved': 0, 'outcomes': []}  # outcomes: (entry, 'updated' / 'resolved')
+        
+        for number, entry in list(self.tickets.items()):
+            # Ticket closed outside the agent - stop tracking it
+            if self.servicenow.ticket_cache.is_open(number) is False:
+                self._forget(number)
+                continue
+            
+            pending = entry['pending']
+            escalated = any(
+                self.SEVERITY_ORDER.get(p['severity'], 1) > self.SEVERITY_ORDER.get(entry['severity'], 1)
+                for p in pending
+            )
+            
+            if now - entry['last_breach'] >= self.healthy_period:
+                if self._resolve(entry):
+                    stats['resolved'] += 1
+                    stats['outcomes'].append((entry, 'resolved'))
+            elif pending and (escalated or len({p['detected_at'] for p in pending}) >= self.update_every):
+                if self._flush(entry, escalated):
+                    stats['updated'] += 1
+                    stats['outcomes'].append((entry, 'updated'))
+        
+        if stats['updated'] or stats['resolved']:
+            logger.info(f"🔄 Ticket lifecycle: {stats['updated']} updated in place, {stats['resolved']} auto-resolved")
+        return stats
+    
+    def snapshot_state(self) -> Dict:
+        """State for agent snapshots"""
+        return {
+            'tickets': {number: dict(entry, keys=sorted(entry['keys'])) for number, entry in self.tickets.items()},
+            'key_index': dict(self.key_index)
+        }
+    
+    def restore_state(self, state: Dict):
+        """Restore from an agent snapshot"""
+        for number, entry in state.get('tickets', {}).items():
+            self.tickets[number] = dict(entry, keys=set(entry['keys']))
+        self.key_index.update(state.get('key_index', {}))
+    
+    def _attach(self, entry: Dict, issue: Dict):
+        """Link an issue key to a tracked ticket"""
+        key = self.issue_key(issue)
+        entry['keys'].add(key)
+        self.key_index[key] = entry['number']
+        if self.SEVERITY_ORDER.get(issue['severity'], 1) > self.SEVERITY_ORDER.get(entry['severity'], 1):
+            entry['severity'] = issue['severity']
+    
+    def _adopt_open_ticket(self, issue: Dict) -> Optional[str]:
+        """Re-attach to an open incident this agent filed for the same host and metric (e.g. before a restart)"""
+        metric = issue['metric'].lower()
+        host = issue.get('host', '*')
+        for ticket in self.servicenow.ticket_cache.open_tickets('incident'):
+            correlation_id = ticket.get('correlation_id', '')
+            if (ticket.get('sys_created_by') != self.servicenow.username or not ticket.get('sys_id')
+                    or not correlation_id.startswith(self.CORRELATION_PREFIX)
+                    or host not in correlation_id[len(self.CORRELATION_PREFIX):].split(',')
+                    or metric not in ticket.get('short_description', '').lower()):
+                continue
+            if ticket['number'] not in self.tickets:
+                self.track(ticket, [], 'incident')
+            self._attach(self.tickets[ticket['number']], issue)
+            logger.info(f"🔗 Attached {issue['metric']} to open ticket {ticket['number']}")
+            return ticket['number']
+        return None
+    
+    def _flush(self, entry: Dict, escalated: bool = False) -> bool:
+        """Write all pending observations as one work-note update"""
+        pending = entry['pending']
+        if not pending:
+            return True
+        
+        by_metric = {}
+        for observation in pending:
+            by_metric.setdefault(observation['metric'], []).append(observation)
+        
+        lines = []
+        worst = entry['severity']
+        for metric, observations in by_metric.items():
+            values = [o['value'] for o in observations]
+            severity = max((o['severity'] for o in observations), key=lambda x: self.SEVERITY_ORDER.get(x, 1))
+            if self.SEVERITY_ORDER.get(severity, 1) > self.SEVERITY_ORDER.get(worst, 1):
+                worst = severity
+            lines.append(f"- {metric}: last {values[-1]:.2f}, min {min(values):.2f}, max {max(values):.2f} ({severity})")
+        
+        updates = {
+            'work_notes': f"Breach still active at {datetime.now(timezone.utc).isoformat()} "
+                          f"({len(pending)} observations since last update):\n" + '\n'.join(lines)
+        }
+        if escalated:
+            updates['urgency'] = self.servicenow._map_priority(worst)
+            updates['impact'] = self.servicenow._map_priority(worst)
+        
+        if not self.servicenow.update_ticket(entry['table'], entry['sys_id'], updates):
+            return False
+        
+        entry['pending'] = []
+        entry['severity'] = worst
+        return True
+    
+    def _resolve(self, entry: Dict) -> bool:
+        """Resolve a ticket whose metrics stayed healthy for the healthy period"""
+        cached = self.servicenow.ticket_cache.get(entry['number']) or {}
+        if cached.get('sys_created_by', self.servicenow.username) != self.servicenow.username:
+            logger.warning(f"⚠️ Not auto-resolving {entry['number']} - not filed by this agent")
+            self._forget(entry['number'])
+            return False
+        
+        self._flush(entry)
+        
+        notes = f"All monitored metrics healthy for {self.healthy_period}s - auto-resolved by AI agent"
+        if entry['table'] == 'incident':
+            updates = {'state': '6', 'close_code': self.close_code, 'close_notes': notes, 'work_notes': notes}
+        else:
+            # Problems follow their own workflow; just record the recovery
+            updates = {'work_notes': f"All monitored metrics healthy for {self.healthy_period}s"}
+        
+        if not self.servicenow.update_ticket(entry['table'], entry['sys_id'], updates):
+            return False
+        
+        # The parent problem stays open for root cause analysis; record that its incident recovered
+        problem = entry.get('problem')
+        if problem:
+            self.servicenow.update_ticket('problem', problem['sys_id'], {
+                'work_notes': f"Linked incident {entry['number']} auto-resolved after {self.healthy_period}s of healthy metrics"
+            })
+        
+        logger.info(f"✅ Auto-resolved {entry['number']} after recovery")
+        self._forget(entry['number'])
+        return True
+    
+    def _forget(self, number: str):
+        """Stop tracking a ticket"""
+        entry = self.tickets.pop(number, None)
+        if entry:
+            for key in entry['keys']:
+                if self.key_index.get(key) == number:
+                    del self.key_index[key]
+
+class PriorityDispatcher:
+    """Severity-ordered dispatch with per-class concurrency limits and latency budgets"""
+    
+    SEVERITY_ORDER = {'critical': 4, 'high': 3, 'medium': 2, 'low': 1}
+    
+    def __init__(self, class_limits: Optional[Dict] = None, latency_budgets: Optional[Dict] = None,
+                 overrun_grace: float = 30.0):
+        # Max concurrent dispatches per severity class
+        self.class_limits = class_limits or {'critical': 4, 'high': 2, 'medium': 1, 'low': 1}
+        # Seconds from detection to ticket, per severity class
+        self.latency_budgets = latency_budgets or {'critical': 30, 'high': 120, 'medium': 600, 'low': 600}
+        # Seconds past the budget a dispatch may still finish before it is given up on
+        self.overrun_grace = overrun_grace
+        
+        self.executors = self.build_executors(self.class_limits)
+        self.llm_latency = 10.0      # EWMA of LLM call latency (seconds)
+        self.dispatch_latency = 2.0  # EWMA of a single ticket write (seconds)
+    
+    def remaining_budget(self, severity: str, detected_at: float) -> float:
+        """Seconds left before the class latency budget is exceeded"""
+        budget = self.latency_budgets.get(severity, 600)
+        return detected_at + budget - time.time()
+    
+    def should_enhance(self, severity: str, detected_at: float) -> bool:
+        """Whether an LLM call still fits in the budget, leaving room to file the ticket"""
+        return self.remaining_budget(severity, detected_at) > self.llm_latency + self.dispatch_latency
+    
+    def record_llm_latency(self, seconds: float):
+        """Fold an observed LLM latency into the estimate"""
+        self.llm_latency = 0.8 * self.llm_latency + 0.2 * seconds
+    
+    def dispatch(self, items: List[Dict]) -> List:
+        """Run items ({'severity', 'detected_at', 'run'}) most severe first; returns results in item order
+        
+        A dispatch still running overrun_grace seconds past its budget is abandoned and yields the
+        item's 'degraded' value (default None); the call itself keeps running on its worker.
+        """
+        order = sorted(range(len(items)), key=lambda i: self.SEVERITY_ORDER.get(items[i]['severity'], 1), reverse=True)
+        futures = {}
         
+        for index in order:
+            item = items[index]
+            executor = self.executors.get(item['severity'], self.executors.get('low'))
+            futures[index] = (executor.submit(self._timed, item['run']), item)
+        
+        results = [None] * len(items)
+        for index in order:
+            future, item = futures[index]
+            timeout = max(self.remaining_budget(item['severity'], item['detected_at']), 0)
+            done, _ = wait_futures([future], timeout=timeout)
+            if not done:
+                logger.warning(f"⏱️ {item['severity']} dispatch exceeded its {self.latency_budgets.get(item['severity'])}s budget")
+            try:
+                remaining = max(self.remaining_budget(item['severity'], item['detected_at']), 0) + self.overrun_grace
+                results[index] = future.result(timeout=remaining)
+            except FutureTimeout:
+                logger.error(f"⏱️ Abandoning {item['severity']} dispatch {self.overrun_grace:.0f}s past its budget")
+                results[index] = item.get('degraded')
+        
+        return results
+    
+    def _timed(self, run):
+        """Run a dispatch and track its latency"""
+        started = time.time()
         try:
-            prompt = f"""
-As an expert infrastructure engineer, enhance this analysis with additional insights:
+            return run()
+        finally:
+            self.dispatch_latency = 0.8 * self.dispatch_latency + 0.2 * (time.time() - started)
+    
+    def build_executors(self, class_limits: Dict) -> Dict:
+        """One executor per severity class, sized by its limit"""
+        return {
+            severity: ThreadPoolExecutor(max_workers=limit, thread_name_prefix=f"dispatch-{severity}")
+            for severity, limit in class_limits.items()
+        }
+    
+    def resize(self, class_limits: Dict, executors: Optional[Dict] = None):
+        """Swap in executors (prebuilt by build_executors, or built here) for the full set of
+        class limits; running dispatches finish on the old ones"""
+        old_executors = self.executors
+        self.executors = executors or self.build_executors(class_limits)
+        self.class_limits = class_limits
+        for executor in old_executors.values():
+            executor.shutdown(wait=False)
 
-Analysis: {json.dumps(analysis, indent=2)}
+class LLMRequestPool:
+    """Bounded-concurrency LLM calls with single-flight coalescing and usage accounting"""
+    
+    def __init__(self, llm, max_concurrent: int = 4, max_batch: int = 4):
+        self.llm = llm
+        self.max_concurrent = max_concurrent
+        self.max_batch = max_batch  # Most items folded into one micro-batched prompt
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix='llm')
+        
+        self.in_flight = {}  # prompt hash -> Future
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'coalesced': 0, 'errors': 0, 'prompt_tokens': 0,
+                      'completion_tokens': 0, 'latency_total': 0.0}
+    
+    def submit(self, prompt: str):
+        """Submit a prompt; identical prompts already in flight share one call"""
+        key = hashlib.sha1(prompt.encode()).hexdigest()
+        with self._lock:
+            future = self.in_flight.get(key)
+            if future:
+                self.stats['coalesced'] += 1
+                return future
+            future = self.executor.submit(self._call, prompt)
+            self.in_flight[key] = future
+        
+        def _done(_):
+            with self._lock:
+                self.in_flight.pop(key, None)
+        future.add_done_callback(_done)
+        return future
+    
+    def build_executor(self, max_concurrent: int) -> ThreadPoolExecutor:
+        """Executor for a given concurrency limit"""
+        return ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix='llm')
+    
+    def resize(self, max_concurrent: int, executor: Optional[ThreadPoolExecutor] = None):
+        """Swap in a pool (prebuilt by build_executor, or built here) with a new concurrency limit;
+        in-flight calls finish on the old one"""
+        executor = executor or self.build_executor(max_concurrent)
+        with self._lock:
+            old_executor = self.executor
+            self.max_concurrent = max_concurrent
+            self.executor = executor
+        old_executor.shutdown(wait=False)
+    
+    def plan_batches(self, count: int) -> List[List[int]]:
+        """Group item indices so every call fits in one concurrent round
+        
+        Up to max_concurrent items run as individual calls in parallel; beyond
+        that, items are micro-batched so the round count (and total latency)
+        stays at one instead of growing with the backlog.
+        """
+        if count <= self.max_concurrent:
+            return [[i] for i in range(count)]
+        size = min(self.max_batch, -(-count // self.max_concurrent))
+        return [list(range(start, min(start + size, count))) for start in range(0, count, size)]
+    
+    def _call(self, prompt: str) -> str:
+        """Invoke the LLM and record latency and token usage"""
+        started = time.time()
+        try:
+            response = self.llm.invoke(prompt)
+        except Exception:
+            with self._lock:
+                self.stats['errors'] += 1
+            raise
+        
+        latency = time.time() - started
+        usage = getattr(response, 'usage_metadata', None) or \
+            getattr(response, 'response_metadata', {}).get('token_usage', {})
+        with self._lock:
+            self.stats['calls'] += 1
+            self.stats['latency_total'] += latency
+            self.stats['prompt_tokens'] += usage.get('input_tokens', usage.get('prompt_tokens', 0))
+            self.stats['completion_tokens'] += usage.get('output_tokens', usage.get('completion_tokens', 0))
+        
+        logger.debug(f"LLM call {latency:.2f}s, usage {usage}")
+        return response.content
 
-Provide enhanced insights in JSON format:
-{{
-  "root_cause_analysis": "likely root causes",
-  "business_impact": "impact on business operations", 
-  "escalation_needed": true/false,
-  "additional_monitoring": "suggested additional metrics to monitor",
-  "preventive_measures": "steps to prevent recurrence"
-}}
-"""
+class LLMInsightCache:
+    """AI insights keyed by issue signature, reused within a TTL"""
+    
+    def __init__(self, ttl: int = 3600):
+        self.ttl = ttl
+        self.entries = {}  # signature -> (timestamp, insights)
+    
+    @staticmethod
+    def signature(issues: List[Dict]) -> str:
+        """Stable key for a set of issues (host, metric, severity)"""
+        return hashlib.sha1('|'.join(sorted(
+            f"{issue.get('host', '*')}:{issue['metric']}:{issue['severity']}" for issue in issues
+        )).encode()).hexdigest()
+    
+    def get(self, signature: str) -> Optional[Dict]:
+        """Cached insights if still fresh"""
+        cached = self.entries.get(signature)
+        if cached and time.time() - cached[0] < self.ttl:
+            return cached[1]
+        return None
+    
+    def put(self, signature: str, insights: Dict):
+        """Store insights"""
+        self.entries[signature] = (time.time(), insights)
+    
+    def prune(self):
+        """Drop expired entries"""
+        now = time.time()
+        self.entries = {key: value for key, value in self.entries.items() if now - value[0] < self.ttl}
+    
+    def snapshot_state(self) -> Dict:
+        """State for agent snapshots"""
+        return {'entries': dict(self.entries)}
+    
+    def restore_state(self, state: Dict):
+        """Restore from an agent snapshot"""
+        self.entries.update(state.get('entries', {}))
+
+class AgentStateStore:
+    """Periodic binary snapshots of agent state for fast warm restarts
+    
+    Components register with a name and expose snapshot_state()/restore_state().
+    File layout: magic, format version, payload length, then zlib-compressed pickle.
+    """
+    
+    MAGIC = b'ITSMSNAP'
+    VERSION = 1
+    HEADER = struct.Struct('<8sHQ')
+    
+    def __init__(self, path: str, snapshot_interval: int = 60):
+        self.path = path
+        self.snapshot_interval = snapshot_interval
+        self.components = {}
+        self.last_snapshot = 0.0
+    
+    def register(self, name: str, component):
+        """Register a component that implements snapshot_state/restore_state"""
+        self.components[name] = component
+    
+    def save(self) -> bool:
+        """Snapshot all components atomically"""
+        try:
+            started = time.perf_counter()
+            state = {name: component.snapshot_state() for name, component in self.components.items()}
+            payload = zlib.compress(pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL), 1)
             
-            response = self.llm.invoke(prompt)
-            ai_insights = json.loads(response.content)
-            analysis['ai_insights'] = ai_insights
-            logger.info(f"🧠 AI enhanced analysis with additional insights")
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(self.HEADER.pack(self.MAGIC, self.VERSION, len(payload)))
+                f.write(payload)
+            os.replace(temp_path, self.path)
             
+            self.last_snapshot = time.time()
+            logger.debug(f"State snapshot written ({len(payload)} bytes, {(time.perf_counter() - started) * 1000:.1f}ms)")
+            return True
         except Exception as e:
-            logger.warning(f"⚠️ AI enhancement failed: {e}")
-        
-        return analysis
+            logger.warning(f"⚠️ State snapshot failed: {e}")
+            return False
     
-    def create_tickets_for_issues(self, analysis: Dict) -> List[Dict]:
-        """Create ServiceNow tickets for identified issues"""
-        created_tickets = []
+    def maybe_save(self) -> bool:
+        """Snapshot if the snapshot interval has elapsed"""
+        if time.time() - self.last_snapshot >= self.snapshot_interval:
+            return self.save()
+        return False
+    
+    def restore(self) -> bool:
+        """Restore registered components from the last snapshot"""
+        if not os.path.exists(self.path):
+            return False
+        try:
+            started = time.perf_counter()
+            with open(self.path, 'rb') as f:
+                magic, version, length = self.HEADER.unpack(f.read(self.HEADER.size))
+                if magic != self.MAGIC or version != self.VERSION:
+                    logger.warning("⚠️ State snapshot format mismatch - starting cold")
+                    return False
+                state = pickle.loads(zlib.decompress(f.read(length)))
+            
+            for name, component in self.components.items():
+                if name in state:
+                    component.restore_state(state[name])
+            
+            self.last_snapshot = time.time()
+            logger.info(f"♻️ Restored agent state ({', '.join(state)}) in {(time.perf_counter() - started) * 1000:.1f}ms")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ State restore failed: {e}")
+            return False
+
+class CycleHistoryStore:
+    """Append-only columnar history of metric samples, issues, AI insights and ticket outcomes
+    
+    Rows are buffered in memory and flushed as immutable segment files under
+    <root>/<table>/<YYYY-MM-DD>/. A segment holds one zlib-compressed block per
+    column (float64 arrays; strings dictionary-encoded as integer codes) behind
+    a small JSON header with the row count and time range, so queries mmap the
+    file, skip segments outside the range and decompress only the columns they
+    touch. Past days are compacted to one segment and dropped after retention.
+    """
+    
+    MAGIC = b'ITSMCOLS'
+    VERSION = 1
+    HEADER = struct.Struct('<8sHI')
+    
+    # table: ((column, 'd' float | 's' string), ...) - ts is always first
+    SCHEMAS = {
+        'samples': (('ts', 'd'), ('host', 's'), ('metric', 's'), ('value', 'd')),
+        'issues': (('ts', 'd'), ('host', 's'), ('metric', 's'), ('severity', 's'), ('value', 'd'),
+                   ('threshold', 'd'), ('detector', 's')),
+        'insights': (('ts', 'd'), ('host', 's'), ('metric', 's'), ('root_cause', 's'), ('business_impact', 's'),
+                     ('escalation_needed', 's')),
+        'tickets': (('ts', 'd'), ('number', 's'), ('table', 's'), ('outcome', 's'), ('severity', 's'),
+                    ('hosts', 's'), ('metrics', 's'))
+    }
+    
+    def __init__(self, root: str, retention_days: int = 30, flush_rows: int = 50000, flush_interval: int = 3600,
+                 cache_columns: int = 64):
+        self.root = root
+        self.retention_days = retention_days
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.cache_columns = cache_columns
         
-        if not analysis.get('issues_found'):
-            return created_tickets
+        self.buffers = {table: {name: [] for name, _ in schema} for table, schema in self.SCHEMAS.items()}
+        self.last_flush = time.time()
+        self.sequence = 0
+        self._headers = {}          # segment path -> parsed header (segments are immutable)
+        self._columns = OrderedDict()  # (segment path, column) -> decoded column, LRU
+        self._lock = threading.RLock()
+    
+    def append(self, table: str, row: Dict):
+        """Buffer one row (missing columns are NaN / empty)"""
+        with self._lock:
+            for name, kind in self.SCHEMAS[table]:
+                value = row.get(name)
+                if kind == 'd':
+                    self.buffers[table][name].append(float(value) if value is not None else math.nan)
+                else:
+                    self.buffers[table][name].append('' if value is None else str(value))
+    
+    def record_cycle(self, analysis: Dict, host: str = '*'):
+        """Samples, issues and AI insights from one monitoring cycle"""
+        now = time.time()
+        metric_hosts = analysis.get('metric_hosts', {})  # Per-metric scope when sources are mixed
+        for metric, value in analysis.get('metrics_analyzed', {}).items():
+            if isinstance(value, (int, float)):
+                self.append('samples', {'ts': now, 'host': metric_hosts.get(metric, host), 'metric': metric,
+                                        'value': value})
         
         for issue in analysis.get('issues', []):
-            # Check for duplicate tickets first
-            search_query = f"short_descriptionLIKE{issue['metric']}"
-            recent_tickets = self.servicenow.search_incidents(search_query, limit=3)
-            
-            # Skip if similar ticket created in last hour
-            duplicate_found = False
-            current_time = datetime.now(timezone.utc)
-            
-            for ticket in recent_tickets:
-                created_time = datetime.fromisoformat(ticket.get('sys_created_on', '').replace('Z', '+00:00'))
-                if (current_time - created_time).total_seconds() < 3600:  # 1 hour
-                    duplicate_found = True
-                    logger.info(f"⏭️ Skipping duplicate ticket for {issue['metric']} (recent: {ticket['number']})")
-                    break
-            
-            if duplicate_found:
+            row = {'ts': issue.get('detected_at', now), 'host': issue.get('host', host), 'metric': issue['metric']}
+            self.append('issues', dict(row, severity=issue['severity'], value=issue.get('current_value'),
+                                       threshold=issue.get('threshold'), detector=issue.get('detector', 'threshold')))
+            insights = issue.get('ai_insights')
+            if insights:
+                self.append('insights', dict(row, root_cause=insights.get('root_cause_analysis'),
+                                             business_impact=insights.get('business_impact'),
+                                             escalation_needed=insights.get('escalation_needed')))
+    
+    def record_ticket(self, number: str, table: str, outcome: str, severity: str = '',
+                      hosts: Optional[List[str]] = None, metrics: Optional[List[str]] = None):
+        """Ticket outcome (created / updated / resolved)"""
+        self.append('tickets', {'ts': time.time(), 'number': number, 'table': table, 'outcome': outcome,
+                                'severity': severity, 'hosts': ','.join(hosts or []), 'metrics': ','.join(metrics or [])})
+    
+    def maybe_flush(self) -> int:
+        """Flush if enough rows are buffered or the flush interval has elapsed"""
+        buffered = max(len(columns['ts']) for columns in self.buffers.values())
+        if buffered >= self.flush_rows or (buffered and time.time() - self.last_flush >= self.flush_interval):
+            return self.flush()
+        return 0
+    
+    def flush(self) -> int:
+        """Write buffered rows as segments, then compact past days and apply retention"""
+        written = 0
+        with self._lock:
+            buffers, self.buffers = self.buffers, {table: {name: [] for name, _ in schema}
+                                                   for table, schema in self.SCHEMAS.items()}
+            self.last_flush = time.time()
+        
+        try:
+            for table, columns in buffers.items():
+                by_day = {}  # UTC day number -> row indexes
+                for index, ts in enumerate(columns['ts']):
+                    by_day.setdefault(int(ts // 86400), []).append(index)
+                for day, rows in by_day.items():
+                    self._write_segment(table, self._day(day * 86400),
+                                        {name: [values[i] for i in rows] for name, values in columns.items()})
+                    written += len(rows)
+            self._maintain()
+        except Exception as e:
+            logger.warning(f"⚠️ History flush failed: {e}")
+        
+        if written:
+            logger.debug(f"History flushed {written} rows")
+        return written
+    
+    def query(self, table: str, start: Optional[float] = None, end: Optional[float] = None,
+              columns: Optional[List[str]] = None, value_above: Optional[float] = None,
+              value_below: Optional[float] = None, **equals) -> Dict[str, list]:
+        """Rows in [start, end] matching string column filters (value or list of values)
+        
+        e.g. query('samples', start=week_ago, host='web-1', metric='system.disk.in_use', value_above=0.9)
+        Returns {column: values} in time order; numeric columns are array('d').
+        """
+        schema = dict(self.SCHEMAS[table])
+        columns = columns or list(schema)
+        start = -math.inf if start is None else start
+        end = math.inf if end is None else end
+        filters = {name: {value} if isinstance(value, str) else set(value) for name, value in equals.items()}
+        unknown = [name for name in list(filters) + columns if schema.get(name) is None]
+        if unknown or (filters and any(schema[name] != 's' for name in filters)):
+            raise ValueError(f"Invalid columns for {table}: {', '.join(unknown) or ', '.join(filters)}")
+        
+        result = {name: array('d') if schema[name] == 'd' else [] for name in columns}
+        
+        for path in self._segments(table, start, end):
+            header = self._header(path)
+            if header['rows'] and header['ts_max'] >= start and header['ts_min'] <= end:
+                self._scan(lambda name, path=path: self._column(path, name), schema,
+                           start, end, columns, filters, value_above, value_below, result)
+        
+        with self._lock:
+            buffered = {name: list(values) for name, values in self.buffers[table].items()}
+        if buffered['ts']:
+            encoded = self._encode(table, buffered)
+            self._scan(encoded.get, schema, start, end, columns, filters, value_above, value_below, result)
+        return result
+    
+    def _scan(self, column, schema: Dict, start: float, end: float, columns: List[str], filters: Dict,
+              value_above: Optional[float], value_below: Optional[float], result: Dict):
+        """Filter one segment (sorted by ts) and append the selected rows to result"""
+        ts = column('ts')[1]
+        lo, hi = bisect_left(ts, start), bisect_right(ts, end)
+        if lo >= hi:
+            return
+        
+        selected = None  # None = every row in [lo, hi)
+        for name, wanted in filters.items():
+            _, codes, dictionary = column(name)
+            keep = {code for code, value in enumerate(dictionary) if value in wanted}
+            if not keep:
+                return
+            if len(keep) < len(dictionary):
+                selected = [i for i in (selected if selected is not None else range(lo, hi)) if codes[i] in keep]
+        
+        if value_above is not None or value_below is not None:
+            values = column('value')[1]
+            above = -math.inf if value_above is None else value_above
+            below = math.inf if value_below is None else value_below
+            selected = [i for i in (selected if selected is not None else range(lo, hi)) if above < values[i] < below]
+        
+        for name in columns:
+            kind, data, *dictionary = column(name)
+            if selected is None:
+                rows = data[lo:hi]
+            else:
+                rows = array(data.typecode, [data[i] for i in selected])
+            result[name].extend(rows if kind == 'd' else [dictionary[0][code] for code in rows])
+    
+    def _encode(self, table: str, columns: Dict[str, list]) -> Dict[str, tuple]:
+        """Column lists -> sorted, typed columns: ('d', array) or ('s', codes, dictionary)"""
+        ts = columns['ts']
+        in_order = all(a <= b for a, b in zip(ts, ts[1:]))  # Usual case: appended in time order
+        order = None if in_order else sorted(range(len(ts)), key=ts.__getitem__)
+        encoded = {}
+        for name, kind in self.SCHEMAS[table]:
+            values = columns[name] if in_order else [columns[name][i] for i in order]
+            if kind == 'd':
+                encoded[name] = ('d', array('d', values))
+            else:
+                dictionary = sorted(set(values))
+                lookup = {value: code for code, value in enumerate(dictionary)}
+                encoded[name] = ('s', array('H' if len(dictionary) < 65536 else 'I', map(lookup.__getitem__, values)),
+                                 dictionary)
+        return encoded
+    
+    def _write_segment(self, table: str, day: str, columns: Dict[str, list]):
+        """Write one immutable segment file atomically"""
+        encoded = self._encode(table, columns)
+        blocks, meta_columns, offset = [], [], 0
+        for name, (kind, data, *dictionary) in encoded.items():
+            block = zlib.compress(data.tobytes(), 6)
+            meta_columns.append({'name': name, 'kind': kind, 'typecode': data.typecode, 'offset': offset,
+                                 'length': len(block), 'dictionary': dictionary[0] if dictionary else None})
+            blocks.append(block)
+            offset += len(block)
+        
+        ts = encoded['ts'][1]
+        meta = json.dumps({'table': table, 'rows': len(ts), 'ts_min': ts[0], 'ts_max': ts[-1],
+                           'columns': meta_columns}).encode()
+        
+        directory = os.path.join(self.root, table, day)
+        os.makedirs(directory, exist_ok=True)
+        self.sequence += 1
+        path = os.path.join(directory, f"{int(ts[0] * 1000)}-{os.getpid()}-{self.sequence}.col")
+        with open(f"{path}.tmp", 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, len(meta)))
+            f.write(meta)
+            for block in blocks:
+                f.write(block)
+        os.replace(f"{path}.tmp", path)
+    
+    def _header(self, path: str) -> Dict:
+        header = self._headers.get(path)
+        if header is None:
+            with open(path, 'rb') as f:
+                magic, version, length = self.HEADER.unpack(f.read(self.HEADER.size))
+                if magic != self.MAGIC or version != self.VERSION:
+                    raise ValueError(f"Unsupported history segment {path}")
+                header = json.loads(f.read(length))
+            header['data_offset'] = self.HEADER.size + length
+            header['columns'] = {column['name']: column for column in header['columns']}
+            self._headers[path] = header
+        return header
+    
+    def _column(self, path: str, name: str) -> tuple:
+        """Decode one column of a segment (memory-mapped read, LRU cached)"""
+        key = (path, name)
+        with self._lock:
+            if key in self._columns:
+                self._columns.move_to_end(key)
+                return self._columns[key]
+        
+        header = self._header(path)
+        meta = header['columns'][name]
+        start = header['data_offset'] + meta['offset']
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            data = array(meta['typecode'], zlib.decompress(mapped[start:start + meta['length']]))
+        column = (meta['kind'], data, meta['dictionary']) if meta['kind'] == 's' else (meta['kind'], data)
+        
+        with self._lock:
+            self._columns[key] = column
+            while len(self._columns) > self.cache_columns:
+                self._columns.popitem(last=False)
+        return column
+    
+    def _segments(self, table: str, start: float, end: float) -> List[str]:
+        """Segment files in partitions overlapping [start, end]"""
+        directory = os.path.join(self.root, table)
+        if not os.path.isdir(directory):
+            return []
+        first = self._day(start) if start > 0 else ''
+        last = self._day(end) if end < math.inf else '~'
+        return [os.path.join(directory, day, name)
+                for day in sorted(os.listdir(directory)) if first <= day <= last
+                for name in sorted(os.listdir(os.path.join(directory, day))) if name.endswith('.col')]
+    
+    def _maintain(self):
+        """Compact closed days into one segment; drop partitions past retention"""
+        today = self._day(time.time())
+        expired = self._day(time.time() - self.retention_days * 86400)
+        
+        for table in self.SCHEMAS:
+            directory = os.path.join(self.root, table)
+            if not os.path.isdir(directory):
                 continue
-            
-            # Create ticket data
-            ai_insights = analysis.get('ai_insights', {})
-            
-            ticket_data = {
-                'title': f"{issue['metric']} Critical Threshold Exceeded - {issue['current_value']:.1f}",
-                'description': f"""
-INFRASTRUCTURE ALERT - {issue['metric']} Issue Detected
+            for day in sorted(os.listdir(directory)):
+                partition = os.path.join(directory, day)
+                if day < expired:
+                    shutil.rmtree(partition, ignore_errors=True)
+                    self._forget(partition)
+                    continue
+                segments = [os.path.join(partition, name) for name in sorted(os.listdir(partition)) if name.endswith('.col')]
+                if day < today and len(segments) > 1:
+                    merged = {name: [] for name, _ in self.SCHEMAS[table]}
+                    for path in segments:
+                        for name, kind in self.SCHEMAS[table]:
+                            _, data, *dictionary = self._column(path, name)
+                            merged[name].extend(data if kind == 'd' else [dictionary[0][code] for code in data])
+                    self._write_segment(table, day, merged)
+                    for path in segments:
+                        os.remove(path)
+                    self._forget(partition)
+    
+    def _forget(self, partition: str):
+        """Drop cached headers/columns for removed segments"""
+        with self._lock:
+            for path in [path for path in self._headers if path.startswith(partition)]:
+                del self._headers[path]
+            for key in [key for key in self._columns if key[0].startswith(partition)]:
+                del self._columns[key]
+    
+    @staticmethod
+    def _day(ts: float) -> str:
+        return datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%d')
+
+class CycleProfiler:
+    """Per-cycle span tree plus a sampling profiler that kicks in on slow cycles
+    
+    If a cycle is still running after `threshold` seconds, a background thread
+    samples every thread's stack until the cycle ends; the samples are written
+    in collapsed-stack format (flamegraph.pl / speedscope) next to a JSON span tree.
+    """
+    
+    def __init__(self, threshold: float = 120.0, output_dir: str = 'cycle_profiles', sample_interval: float = 0.01):
+        self.threshold = threshold
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.last_cycle = None
+        self._local = threading.local()
+    
+    @contextmanager
+    def cycle(self, name: str):
+        """Profile one monitoring cycle"""
+        root = {'name': name, 'start': time.perf_counter(), 'duration': None, 'children': []}
+        self._local.stack = [root]
+        samples = Counter()
+        stop = threading.Event()
+        sampler = threading.Timer(self.threshold, self._sample, args=(threading.get_ident(), samples, stop))
+        sampler.daemon = True
+        sampler.start()
+        
+        error = None
+        try:
+            yield root
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            stop.set()
+            sampler.cancel()
+            root['duration'] = time.perf_counter() - root['start']
+            # The sampler may be mid-pass; let it finish before the samples are read
+            sampler.join()
+            self._local.stack = []
+            self.last_cycle = root
+            if root['duration'] >= self.threshold or error:
+                self._report(root, samples, error)
+    
+    @contextmanager
+    def span(self, name: str):
+        """Time a step inside the current cycle (no-op outside a cycle)"""
+        stack = getattr(self._local, 'stack', None)
+        if not stack:
+            yield
+            return
+        
+        node = {'name': name, 'start': time.perf_counter(), 'duration': None, 'children': []}
+        stack[-1]['children'].append(node)
+        stack.append(node)
+        try:
+            yield
+        finally:
+            node['duration'] = time.perf_counter() - node['start']
+            stack.pop()
+    
+    def _sample(self, cycle_thread: int, samples: Counter, stop: threading.Event):
+        """Sample all thread stacks until the cycle finishes"""
+        logger.warning(f"🐢 Cycle exceeded {self.threshold}s - sampling profiler started")
+        own_thread = threading.get_ident()
+        
+        while not stop.is_set():
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                thread_name = 'cycle' if thread_id == cycle_thread else names.get(thread_id, str(thread_id))
+                stack.append(thread_name)
+                samples[';'.join(reversed(stack))] += 1
+            stop.wait(self.sample_interval)
+    
+    def _report(self, root: Dict, samples: Counter, error: Optional[Exception]):
+        """Log the span tree and dump the profile files"""
+        reason = f"failed ({error})" if error else f"took {root['duration']:.1f}s (threshold {self.threshold}s)"
+        lines = []
+        
+        def walk(node: Dict, depth: int):
+            duration = node['duration'] if node['duration'] is not None else time.perf_counter() - node['start']
+            lines.append(f"{'  ' * depth}{node['name']}: {duration * 1000:.0f}ms")
+            for child in node['children']:
+                walk(child, depth + 1)
+        walk(root, 1)
+        
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            prefix = os.path.join(self.output_dir, f"{root['name']}-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}")
+            with open(f"{prefix}.spans.json", 'w') as f:
+                json.dump(root, f, indent=2)
+            if samples:
+                with open(f"{prefix}.collapsed", 'w') as f:
+                    for stack, count in samples.most_common():
+                        f.write(f"{stack} {count}\n")
+            location = f" - profile: {prefix}.*"
+        except Exception as e:
+            location = f" - profile dump failed: {e}"
+        
+        logger.warning(f"🐢 Cycle {root['name']} {reason}{location}\n" + '\n'.join(lines))
+
+class TicketRenderer:
+    """Precompiled ticket templates with shared sections rendered once per cycle"""
+    
+    AI_SECTION = """AI INSIGHTS:
+- Root Cause: {root_cause}
+- Business Impact: {business_impact}
+- Preventive Measures: {preventive_measures}
+
+MONITORING DATA:
+{monitoring_data}
+
+This ticket was automatically created by the AI Infrastructure Monitoring Agent.
+"""
+    
+    DEFAULT_TEMPLATES = {
+        'issue_title': "{metric} {headline} - {current_value:.1f}",
+        'issue_description': """
+INFRASTRUCTURE ALERT - {metric} Issue Detected
 
 CURRENT STATE:
-- Metric: {issue['metric']}
-- Current Value: {issue['current_value']:.2f}
-- Threshold: {issue['threshold']}
-- Severity: {issue['severity'].upper()}
+- Metric: {metric}
+- Current Value: {current_value:.2f}
+- Threshold: {threshold}
+- Severity: {severity_upper}
 
 IMPACT:
-{issue['impact']}
+{impact}
 
 TECHNICAL DETAILS:
-{issue['description']}
+{description}
 
 RECOMMENDED ACTIONS:
-{issue['actions']}
+{actions}
 
-AI INSIGHTS:
-- Root Cause: {ai_insights.get('root_cause_analysis', 'Analysis pending')}
-- Business Impact: {ai_insights.get('business_impact', 'Assessment pending')}
-- Preventive Measures: {ai_insights.get('preventive_measures', 'To be determined')}
+""" + AI_SECTION,
+        'group_title': "Correlated Infrastructure Issue on {hosts}: {metric_names}",
+        'group_description': """
+INFRASTRUCTURE ALERT - {issue_count} Correlated Issues Detected
 
-MONITORING DATA:
-{json.dumps(analysis['metrics_analyzed'], indent=2)}
+CURRENT STATE:
+- Hosts: {hosts}
+- Highest Severity: {severity_upper}
 
-This ticket was automatically created by the AI Infrastructure Monitoring Agent.
-""",
-                'urgency': issue['severity'],
-                'impact': issue['severity'],
-                'technical_details': issue['description'],
-                'recommended_actions': issue['actions']
+LINKED ISSUES:
+{linked_issues}
+
+IMPACT:
+{impact}
+
+RECOMMENDED ACTIONS:
+{actions}
+
+""" + AI_SECTION
+    }
+    
+    SHARED_FIELDS = {'monitoring_data', 'root_cause', 'business_impact', 'preventive_measures'}
+    FIELDS = {
+        'issue_title': {'metric', 'headline', 'current_value', 'threshold', 'severity', 'severity_upper', 'host'},
+        'issue_description': {'metric', 'headline', 'current_value', 'threshold', 'severity', 'severity_upper',
+                              'host', 'impact', 'description', 'actions'} | SHARED_FIELDS,
+        'group_title': {'hosts', 'metric_names', 'issue_count', 'severity', 'severity_upper'},
+        'group_description': {'hosts', 'metric_names', 'issue_count', 'severity', 'severity_upper',
+                              'linked_issues', 'impact', 'actions'} | SHARED_FIELDS
+    }
+    
+    def __init__(self, overrides: Optional[Dict] = None):
+        """Compile default templates, replaced by any per-tenant overrides"""
+        sources = dict(self.DEFAULT_TEMPLATES, **(overrides or {}))
+        unknown = set(sources) - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown ticket templates: {', '.join(sorted(unknown))}")
+        self.templates = {name: TicketTemplate(source, self.FIELDS[name]) for name, source in sources.items()}
+        self._shared_key = None
+        self._shared = {}
+    
+    def begin_cycle(self, analysis: Dict):
+        """Render sections shared by every ticket in this cycle"""
+        metrics = analysis.get('metrics_analyzed', {})
+        if self._shared_key is metrics:
+            return
+        self._shared_key = metrics
+        self._shared = {'monitoring_data': json.dumps(metrics, indent=2)}
+    
+    def render_issue(self, issue: Dict, ai_insights: Dict) -> Dict:
+        """Title and description for one issue"""
+        severity = issue['severity']
+        context = {
+            **self._shared,
+            'metric': issue['metric'],
+            'headline': 'Baseline Deviation' if issue.get('detector') == 'baseline' else 'Critical Threshold Exceeded',
+            'current_value': issue['current_value'],
+            'threshold': issue['threshold'],
+            'severity': severity,
+            'severity_upper': severity.upper(),
+            'host': issue.get('host', '*'),
+            'impact': issue['impact'],
+            'description': issue['description'],
+            'actions': issue['actions'],
+            'root_cause': ai_insights.get('root_cause_analysis', 'Analysis pending'),
+            'business_impact': ai_insights.get('business_impact', 'Assessment pending'),
+            'preventive_measures': ai_insights.get('preventive_measures', 'To be determined')
+        }
+        return {
+            'title': self.templates['issue_title'].render(context),
+            'description': self.templates['issue_description'].render(context)
+        }
+    
+    def render_group(self, group: Dict, linked_issues: str, actions: str, ai_insights: Dict) -> Dict:
+        """Title and description for a correlated group"""
+        issues = group['issues']
+        context = {
+            **self._shared,
+            'hosts': ', '.join(group['hosts']),
+            'metric_names': ', '.join(issue['metric'] for issue in issues),
+            'issue_count': len(issues),
+            'severity': group['severity'],
+            'severity_upper': group['severity'].upper(),
+            'linked_issues': linked_issues,
+            'impact': issues[0]['impact'],
+            'actions': actions,
+            'root_cause': ai_insights.get('root_cause_analysis', 'Analysis pending'),
+            'business_impact': ai_insights.get('business_impact', 'Assessment pending'),
+            'preventive_measures': ai_insights.get('preventive_measures', 'To be determined')
+        }
+        return {
+            'title': self.templates['group_title'].render(context),
+            'description': self.templates['group_description'].render(context)
+        }
+
+class ConfigWatcher:
+    """Poll a JSON config file's mtime and return validated changes"""
+    
+    SEVERITIES = ('critical', 'high', 'medium', 'low')
+    CREDENTIAL_KEYS = ('servicenow_user', 'servicenow_password', 'datadog_api_key', 'datadog_app_key')
+    
+    def __init__(self, path: str, poll_interval: float = 5.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.last_poll = 0.0
+        self.last_signature = None
+    
+    def poll(self, force: bool = False) -> Optional[Dict]:
+        """New validated config if the file changed since the last poll, else None"""
+        if not force and time.time() - self.last_poll < self.poll_interval:
+            return None
+        self.last_poll = time.time()
+        
+        try:
+            stat = os.stat(self.path)
+        except OSError as e:
+            logger.warning(f"⚠️ Config file unavailable: {e}")
+            return None
+        
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self.last_signature:
+            return None
+        self.last_signature = signature
+        
+        try:
+            with open(self.path) as f:
+                config = json.load(f)
+            return self.validate(config)
+        except Exception as e:
+            logger.error(f"❌ Rejected config change in {self.path}: {e}")
+            return None
+    
+    @classmethod
+    def validate(cls, config: Dict) -> Dict:
+        """Check types and ranges; resolves "env:NAME" credential values"""
+        if not isinstance(config, dict):
+            raise ValueError("config must be a JSON object")
+        
+        def positive_number(value, name):
+            if not isinstance(value, (int, float)) or isinstance(value, bool) or value <= 0:
+                raise ValueError(f"{name} must be a positive number")
+        
+        def positive_integer(value, name):
+            if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+                raise ValueError(f"{name} must be an integer >= 1")
+        
+        for name, value in config.get('thresholds', {}).items():
+            if name not in ('cpu_high', 'memory_low', 'disk_high', 'load_high'):
+                raise ValueError(f"unknown threshold: {name}")
+            positive_number(value, f"thresholds.{name}")
+        
+        for name in ('monitoring_interval', 'healthy_period', 'correlation_window'):
+            if name in config:
+                positive_number(config[name], name)
+        
+        # Counts and pool sizes
+        for name in ('update_every', 'llm_concurrency', 'problem_threshold'):
+            if name in config:
+                positive_integer(config[name], name)
+        
+        metrics = config.get('metrics')
+        if metrics is not None and (not isinstance(metrics, list) or not metrics
+                                    or not all(isinstance(m, str) and m for m in metrics)):
+            raise ValueError("metrics must be a non-empty list of metric names")
+        
+        for section, check in (('class_limits', positive_integer), ('latency_budgets', positive_number)):
+            for severity, value in config.get(section, {}).items():
+                if severity not in cls.SEVERITIES:
+                    raise ValueError(f"unknown severity in {section}: {severity}")
+                check(value, f"{section}.{severity}")
+        
+        credentials = {}
+        for key, value in config.get('credentials', {}).items():
+            if key not in cls.CREDENTIAL_KEYS:
+                raise ValueError(f"unknown credential: {key}")
+            if isinstance(value, str) and value.startswith('env:'):
+                value = os.getenv(value[4:], '')
+            if not isinstance(value, str) or not value:
+                raise ValueError(f"credential {key} is empty")
+            credentials[key] = value
+        if ('servicenow_user' in credentials) != ('servicenow_password' in credentials) or \
+           ('datadog_api_key' in credentials) != ('datadog_app_key' in credentials):
+            raise ValueError("credentials must be rotated in user/password and api/app key pairs")
+        
+        return dict(config, credentials=credentials)
+
+class ApiCallBudget:
+    """Global Datadog + ServiceNow call budget shared by adaptive schedulers"""
+    
+    def __init__(self, calls_per_hour: float):
+        self.calls_per_hour = calls_per_hour
+        self.demand = {}  # scope -> committed calls per second
+        self._lock = threading.Lock()
+    
+    def min_interval(self, scope: str, cycle_cost: float) -> float:
+        """Shortest interval for a scope that keeps total demand inside the budget"""
+        with self._lock:
+            available = self.calls_per_hour / 3600 - sum(rate for s, rate in self.demand.items() if s != scope)
+        return cycle_cost / available if available > 0 else float('inf')
+    
+    def commit(self, scope: str, cycle_cost: float, interval: float):
+        """Record a scope's demand at its chosen interval"""
+        with self._lock:
+            self.demand[scope] = cycle_cost / interval
+
+class AdaptiveScheduler:
+    """Monitoring interval for one scope, driven by its health
+    
+    Tightens when issues are found (more for higher severity) or a metric is
+    on course to cross its threshold before the next regular sample, backs off
+    exponentially while healthy, and never exceeds a shared API call budget.
+    """
+    
+    SEVERITY_FACTORS = {'critical': 0.1, 'high': 0.25, 'medium': 0.5, 'low': 1.0}
+    TREND_FACTOR = 0.5
+    
+    # metric: (analyzer threshold key, direction that breaches, scale to threshold units)
+    TRENDS = {
+        'system.cpu.user': ('cpu_high', 1, 1),
+        'system.mem.pct_usable': ('memory_low', -1, 1),
+        'system.disk.in_use': ('disk_high', 1, 100),
+        'system.load.1': ('load_high', 1, 1)
+    }
+    
+    def __init__(self, base_interval: float, min_interval: float = 60, max_interval: Optional[float] = None,
+                 backoff: float = 2.0, budget: Optional[ApiCallBudget] = None, scope: str = '*'):
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval or base_interval * 4
+        self.backoff = backoff
+        self.budget = budget
+        self.scope = scope
+        
+        self.interval = float(base_interval)
+        self.cycle_cost = None  # EWMA of API calls per cycle
+        self.healthy_streak = 0
+        self.last_metrics = None
+        self.last_time = None
+    
+    def update(self, analysis: Dict, thresholds: Dict, api_calls: Optional[int] = None) -> float:
+        """Choose the interval until the next cycle from this cycle's analysis"""
+        now = time.time()
+        if api_calls is not None:
+            self.cycle_cost = api_calls if self.cycle_cost is None else 0.7 * self.cycle_cost + 0.3 * api_calls
+        
+        metrics = analysis.get('metrics_analyzed', {})
+        trending = self._trending(metrics, thresholds, now)
+        self.last_metrics, self.last_time = metrics, now
+        
+        if analysis.get('issues_found'):
+            self.healthy_streak = 0
+            target = self.base_interval * self.SEVERITY_FACTORS.get(analysis['highest_severity'], 1.0)
+            reason = f"{analysis['highest_severity']} issues"
+        elif trending:
+            self.healthy_streak = 0
+            target = self.base_interval * self.TREND_FACTOR
+            reason = f"{', '.join(trending)} trending to threshold"
+        else:
+            # Back to the base interval on recovery, then double per healthy cycle up to the cap
+            target = min(self.base_interval * self.backoff ** self.healthy_streak, self.max_interval)
+            if target < self.max_interval:
+                self.healthy_streak += 1
+            reason = 'healthy'
+        
+        interval = min(max(target, self.min_interval), self.max_interval)
+        if self.budget and self.cycle_cost:
+            floor = self.budget.min_interval(self.scope, self.cycle_cost)
+            if floor > interval:
+                interval, reason = min(floor, self.max_interval), f"{reason}, API budget"
+            self.budget.commit(self.scope, self.cycle_cost, interval)
+        
+        if interval != self.interval:
+            logger.info(f"⏲️ [{self.scope}] Interval {self.interval:.0f}s -> {interval:.0f}s ({reason})")
+        self.interval = interval
+        return interval
+    
+    def _trending(self, metrics: Dict, thresholds: Dict, now: float) -> List[str]:
+        """Metrics whose recent slope crosses their threshold within one base interval"""
+        if not self.last_metrics or now <= self.last_time:
+            return []
+        
+        elapsed = now - self.last_time
+        trending = []
+        for metric, (key, direction, scale) in self.TRENDS.items():
+            if metric not in metrics or metric not in self.last_metrics or key not in thresholds:
+                continue
+            value = metrics[metric] * scale
+            slope = (value - self.last_metrics[metric] * scale) / elapsed
+            projected = value + slope * self.base_interval
+            if (projected - thresholds[key]) * direction > 0 and slope * direction > 0:
+                trending.append(metric)
+        return trending
+
+class ITSMAgent:
+    """Complete ITSM Agent with AI analysis"""
+    
+    def __init__(self, servicenow_url: str, servicenow_user: str, servicenow_password: str,
+                 datadog_api_key: str, datadog_app_key: str, datadog_site: str = "datadoghq.com",
+                 openai_api_key: str = None, monitoring_interval: int = 600,
+                 correlation_window: int = 300, problem_threshold: int = 3,
+                 healthy_period: int = 1800, update_every: int = 3,
+                 baseline_checkpoint: Optional[str] = None, state_snapshot: Optional[str] = None,
+                 llm_cache_ttl: int = 3600, latency_budgets: Optional[Dict] = None, llm_concurrency: int = 4,
+                 ticket_templates: Optional[Dict] = None, profile_threshold: float = 120.0,
+                 profile_dir: str = 'cycle_profiles', config_path: Optional[str] = None,
+                 metrics_source: str = 'datadog', adaptive_interval: bool = False,
+                 min_interval: int = 60, max_interval: Optional[int] = None,
+                 api_budget: Optional[ApiCallBudget] = None, scope_name: Optional[str] = None,
+                 history_dir: Optional[str] = None, history_retention_days: int = 30,
+                 knowledge_base_checkpoint: Optional[str] = None, baseline_anomalies: bool = False,
+                 knowledge_base_index: bool = False,
+                 servicenow_session: Optional[requests.Session] = None,
+                 datadog_session: Optional[requests.Session] = None):
+        
+        self.servicenow = ServiceNowClient(servicenow_url, servicenow_user, servicenow_password, servicenow_session)
+        self.datadog = DatadogClient(datadog_api_key, datadog_app_key, datadog_site, datadog_session)
+        # Baseline anomaly detection is opt-in; static thresholds always apply
+        self.baseline = BaselineEngine(checkpoint_path=baseline_checkpoint) if baseline_anomalies else None
+        self.analyzer = InfrastructureAnalyzer(self.baseline)
+        self.correlator = IncidentCorrelator(correlation_window, problem_threshold)
+        self.lifecycle = TicketLifecycleManager(self.servicenow, healthy_period, update_every)
+        self.dispatcher = PriorityDispatcher(latency_budgets=latency_budgets)
+        self.renderer = TicketRenderer(ticket_templates)
+        self.profiler = CycleProfiler(profile_threshold, profile_dir)
+        self.monitoring_interval = monitoring_interval
+        
+        # AI insights reused while the same set of issues persists
+        self.llm_cache = LLMInsightCache(llm_cache_ttl)
+        
+        # Similar past tickets (and how they were resolved) for dedup and LLM context; indexed
+        # in the background and checkpointed separately (the index is large and changes slowly); opt-in
+        self.knowledge_base = None
+        if knowledge_base_index:
+            self.knowledge_base = IncidentKnowledgeBase(self.servicenow.instance_url, self.servicenow.headers,
+                                                        checkpoint_path=knowledge_base_checkpoint,
+                                                        session=self.servicenow.session)
+            self.knowledge_base.refresh()
+        
+        # Warm restart: dedup entries, ticket map, baselines and LLM cache
+        self.state_store = None
+        if state_snapshot:
+            self.state_store = AgentStateStore(state_snapshot)
+            self.state_store.register('ticket_cache', self.servicenow.ticket_cache)
+            self.state_store.register('lifecycle', self.lifecycle)
+            if self.baseline:
+                self.state_store.register('baseline', self.baseline)
+            self.state_store.register('llm_cache', self.llm_cache)
+            self.state_store.restore()
+        
+        # Initialize OpenAI if available and key provided
+        self.llm = None
+        if openai_api_key and LANGCHAIN_AVAILABLE:
+            try:
+                self.llm = ChatOpenAI(
+                    temperature=0.1,
+                    model="gpt-4",
+                    api_key=openai_api_key
+                )
+                logger.info("✅ OpenAI GPT-4 initialized for enhanced analysis")
+            except Exception as e:
+                logger.warning(f"⚠️ OpenAI initialization failed: {e}")
+        
+        self.llm_pool = LLMRequestPool(self.llm, max_concurrent=llm_concurrency) if self.llm else None
+        
+        self.metrics = ['system.cpu.user', 'system.mem.pct_usable', 'system.disk.in_use', 'system.load.1']
+        self.metric_sources = {}  # metric -> 'local' / 'datadog' for the last collection
+        
+        # Local collection: this host's metrics with no ingestion lag; Datadog stays
+        # the source for anything not available locally and for fleet-wide scope
+        self.local_metrics = None
+        if metrics_source == 'local' and LocalMetricsCollector.available():
+            self.local_metrics = LocalMetricsCollector()
+            logger.info(f"📟 Collecting host metrics locally on {self.local_metrics.hostname}")
+        elif metrics_source == 'local':
+            logger.warning("⚠️ Local metric collection unavailable on this host - using Datadog")
+        
+        # Queryable per-cycle history (samples, issues, insights, ticket outcomes)
+        self.history = CycleHistoryStore(history_dir, history_retention_days) if history_dir else None
+        
+        # Adaptive cadence: count API calls per cycle to stay inside the shared budget
+        self.scheduler = None
+        self.api_calls = 0
+        if adaptive_interval:
+            self.scheduler = AdaptiveScheduler(monitoring_interval, min_interval, max_interval,
+                                               budget=api_budget, scope=scope_name or self.metrics_host)
+            for session in {id(s): s for s in (self.servicenow.session, self.datadog.session)}.values():
+                session.hooks['response'].append(self._count_api_call)
+        
+        # Hot-reloadable config, applied between cycles
+        self.config_watcher = ConfigWatcher(config_path) if config_path else None
+        if self.config_watcher:
+            self.reload_config(force=True)
+    
+    @property
+    def next_interval(self) -> float:
+        """Seconds until the next cycle (adaptive when enabled)"""
+        return self.scheduler.interval if self.scheduler else self.monitoring_interval
+    
+    def _count_api_call(self, response, *args, **kwargs):
+        """Session response hook counting Datadog/ServiceNow calls"""
+        self.api_calls += 1
+    
+    @property
+    def metrics_host(self) -> str:
+        """Agent scope: this host when sampling locally, else fleet-wide"""
+        return self.local_metrics.hostname if self.local_metrics else '*'
+    
+    def collect_metrics(self) -> Dict:
+        """Collect current metrics (locally when enabled, falling back to Datadog)"""
+        # Missing data defaults to healthy values (100% memory available, 0 otherwise)
+        defaults = {'system.mem.pct_usable': 100}
+        metrics, sources = {}, {}
+        
+        for metric in self.metrics:
+            value = None
+            if self.local_metrics and metric in LocalMetricsCollector.SUPPORTED_METRICS:
+                value = self.local_metrics.get_metric(metric)
+            sources[metric] = 'datadog' if value is None else 'local'
+            if value is None:
+                value = self.datadog.get_metric(metric)
+            metrics[metric] = value or defaults.get(metric, 0)
+        
+        self.metric_sources = sources
+        return metrics
+    
+    def analyze_collected(self, metrics: Dict) -> Dict:
+        """Analyze metrics by source scope: local samples are this host's, Datadog values fleet-wide"""
+        metric_hosts = {
+            metric: self.local_metrics.hostname if self.metric_sources.get(metric) == 'local' else '*'
+            for metric in metrics
+        }
+        scopes = {}
+        for metric, value in metrics.items():
+            scopes.setdefault(metric_hosts[metric], {})[metric] = value
+        
+        analyses = [self.analyzer.analyze_metrics(scoped, host=host) for host, scoped in scopes.items()]
+        if len(analyses) == 1:
+            analysis = analyses[0]
+        else:
+            issues = [issue for scoped in analyses for issue in scoped['issues']]
+            analysis = {
+                'issues_found': len(issues) > 0,
+                'issue_count': len(issues),
+                'issues': issues,
+                'highest_severity': self.analyzer._get_highest_severity(issues),
+                'metrics_analyzed': metrics
             }
-            
-            # Create the ticket
-            ticket = self.servicenow.create_incident(ticket_data)
+        
+        analysis['metric_hosts'] = metric_hosts
+        return analysis
+    
+    def reload_config(self, force: bool = False) -> bool:
+        """Apply a changed config file between cycles; caches and pools stay warm"""
+        config = self.config_watcher.poll(force=force) if self.config_watcher else None
+        if not config:
+            return False
+        
+        # Build everything first, then swap references so a cycle never sees half a config
+        thresholds = dict(self.analyzer.thresholds, **config.get('thresholds', {}))
+        metrics = list(config.get('metrics', self.metrics))
+        credentials = config['credentials']
+        class_limits = dict(self.dispatcher.class_limits, **config.get('class_limits', {}))
+        if credentials.get('servicenow_user', self.servicenow.username) != self.servicenow.username:
+            logger.error(f"❌ Rejected config change in {self.config_watcher.path}: servicenow_user must stay "
+                         f"{self.servicenow.username} (ticket ownership and the ticket cache are keyed on it)")
+            return False
+        llm_concurrency = config.get('llm_concurrency', self.llm_pool.max_concurrent if self.llm_pool else None)
+        
+        dispatch_executors, llm_executor = None, None
+        try:
+            if class_limits != self.dispatcher.class_limits:
+                dispatch_executors = self.dispatcher.build_executors(class_limits)
+            if self.llm_pool and llm_concurrency != self.llm_pool.max_concurrent:
+                llm_executor = self.llm_pool.build_executor(llm_concurrency)
+        except Exception as e:
+            for executor in list((dispatch_executors or {}).values()) + [llm_executor]:
+                if executor:
+                    executor.shutdown(wait=False)
+            # Nothing was applied; forget the file so the next poll retries it
+            self.config_watcher.last_signature = None
+            logger.error(f"❌ Could not apply config from {self.config_watcher.path}: {e}")
+            return False
+        
+        self.analyzer.thresholds = thresholds
+        self.metrics = metrics
+        self.monitoring_interval = config.get('monitoring_interval', self.monitoring_interval)
+        if self.scheduler:
+            self.scheduler.base_interval = self.monitoring_interval
+        self.lifecycle.healthy_period = config.get('healthy_period', self.lifecycle.healthy_period)
+        self.lifecycle.update_every = config.get('update_every', self.lifecycle.update_every)
+        self.correlator.window_seconds = config.get('correlation_window', self.correlator.window_seconds)
+        self.correlator.problem_threshold = config.get('problem_threshold', self.correlator.problem_threshold)
+        self.dispatcher.latency_budgets = dict(self.dispatcher.latency_budgets, **config.get('latency_budgets', {}))
+        
+        if dispatch_executors:
+            self.dispatcher.resize(class_limits, dispatch_executors)
+        if llm_executor:
+            self.llm_pool.resize(llm_concurrency, llm_executor)
+        
+        if 'servicenow_user' in credentials:
+            self.servicenow.set_credentials(credentials['servicenow_user'], credentials['servicenow_password'])
+        if 'datadog_api_key' in credentials:
+            self.datadog.set_keys(credentials['datadog_api_key'], credentials['datadog_app_key'])
+        
+        logger.info(f"🔧 Applied config from {self.config_watcher.path} "
+                    f"(interval {self.monitoring_interval}s, {len(self.metrics)} metrics, thresholds {thresholds})")
+        return True
+    
+    def enhance_analysis_with_ai(self, analysis: Dict) -> Dict:
+        """Enhance each issue with AI insights (concurrent, cached, micro-batched)"""
+        if not self.llm_pool or not analysis.get('issues_found'):
+            return analysis
+        
+        # Issues unchanged since a recent cycle reuse those insights
+        pending = []
+        for issue in analysis['issues']:
+            cached = self.llm_cache.get(LLMInsightCache.signature([issue]))
+            if cached:
+                issue['ai_insights'] = cached
+            else:
+                pending.append(issue)
+        
+        if pending:
+            # Don't let a slow LLM call push a critical ticket past its latency budget
+            severity = analysis['highest_severity']
+            detected_at = min(issue.get('detected_at', time.time()) for issue in analysis['issues'])
+            if not self.dispatcher.should_enhance(severity, detected_at):
+                logger.warning(f"⏱️ Skipping AI enhancement to meet {severity} latency budget")
+            else:
+                timeout = self.dispatcher.remaining_budget(severity, detected_at) - self.dispatcher.dispatch_latency
+                if self.knowledge_base:
+                    self.knowledge_base.refresh()
+                    for issue in pending:
+                        similar = [{key: match[key] for key in ('number', 'short_description', 'resolution', 'similarity')}
+                                   for match in self.knowledge_base.query(self._issue_text(issue)) if match['resolution']]
+                        if similar:
+                            issue['similar_incidents'] = similar
+                self._fan_out_insights(pending, analysis['metrics_analyzed'], timeout)
+        
+        # Analysis-level insights come from the most severe issue that has them
+        severity_order = {'critical': 4, 'high': 3, 'medium': 2, 'low': 1}
+        enhanced = [issue for issue in analysis['issues'] if issue.get('ai_insights')]
+        if enhanced:
+            top = max(enhanced, key=lambda x: severity_order.get(x['severity'], 1))
+            analysis['ai_insights'] = top['ai_insights']
+            logger.info(f"🧠 AI enhanced {len(enhanced)}/{len(analysis['issues'])} issues with additional insights")
+        
+        return analysis
+    
+    def _fan_out_insights(self, issues: List[Dict], metrics: Dict, timeout: float):
+        """Run one LLM round over the issues: parallel single prompts or micro-batches"""
+        started = time.time()
+        # Most severe first: the pool runs prompts in submission order
+        issues = sorted(issues, key=lambda issue: PriorityDispatcher.SEVERITY_ORDER.get(issue['severity'], 1), reverse=True)
+        calls = []
+        for batch in self.llm_pool.plan_batches(len(issues)):
+            members = [issues[i] for i in batch]
+            prompt = self._insight_prompt(members[0], metrics) if len(members) == 1 else self._batch_insight_prompt(members, metrics)
+            calls.append((members, self.llm_pool.submit(prompt)))
+        
+        for members, future in calls:
+            try:
+                remaining = max(timeout - (time.time() - started), 1)
+                parsed = json.loads(future.result(timeout=remaining))
+                # Single prompts answer one object, batches an array of one object per issue
+                results = [parsed] if len(members) == 1 else parsed
+                if not (isinstance(results, list) and len(results) == len(members)
+                        and all(isinstance(insights, dict) for insights in results)):
+                    expected = 'a JSON object' if len(members) == 1 else f"a JSON array of {len(members)} objects"
+                    logger.warning(f"⚠️ Ignoring malformed AI insights for {', '.join(i['metric'] for i in members)} "
+                                   f"(expected {expected})")
+                    continue
+                for issue, insights in zip(members, results):
+                    issue['ai_insights'] = insights
+                    self.llm_cache.put(LLMInsightCache.signature([issue]), insights)
+            except Exception as e:
+                logger.warning(f"⚠️ AI enhancement failed for {', '.join(i['metric'] for i in members)}: {e}")
+        
+        self.dispatcher.record_llm_latency(time.time() - started)
+    
+    def _insight_prompt(self, issue: Dict, metrics: Dict) -> str:
+        """Prompt for a single issue"""
+        return f"""
+As an expert infrastructure engineer, enhance this issue analysis with additional insights:
+
+Issue: {json.dumps(self._issue_for_prompt(issue))}
+Host Metrics: {json.dumps(metrics)}
+
+Where similar_incidents are given, build on how those past tickets were resolved.
+
+Provide enhanced insights in JSON format:
+{{
+  "root_cause_analysis": "likely root causes",
+  "business_impact": "impact on business operations", 
+  "escalation_needed": true/false,
+  "additional_monitoring": "suggested additional metrics to monitor",
+  "preventive_measures": "steps to prevent recurrence"
+}}
+"""
+    
+    def _batch_insight_prompt(self, issues: List[Dict], metrics: Dict) -> str:
+        """Prompt covering several issues, answered as a JSON array in the same order"""
+        numbered = '\n'.join(f"{n}. {json.dumps(self._issue_for_prompt(issue))}" for n, issue in enumerate(issues, 1))
+        return f"""
+As an expert infrastructure engineer, enhance each of these {len(issues)} issue analyses with additional insights:
+
+Issues:
+{numbered}
+Host Metrics: {json.dumps(metrics)}
+
+Where similar_incidents are given, build on how those past tickets were resolved.
+
+Respond with a JSON array of exactly {len(issues)} objects, one per issue in the same order, each:
+{{
+  "root_cause_analysis": "likely root causes",
+  "business_impact": "impact on business operations", 
+  "escalation_needed": true/false,
+  "additional_monitoring": "suggested additional metrics to monitor",
+  "preventive_measures": "steps to prevent recurrence"
+}}
+"""
+    
+    def _issue_for_prompt(self, issue: Dict) -> Dict:
+        """Issue fields relevant to the LLM (no timestamps, so identical issues share prompts)"""
+        return {key: issue[key] for key in ('metric', 'current_value', 'threshold', 'severity', 'description', 'host',
+                                            'similar_incidents')
+                if key in issue}
+    
+    def _issue_text(self, issue: Dict) -> str:
+        """Issue text for knowledge base lookups"""
+        host = issue.get('host', '*')
+        return f"{issue['metric']} {issue['description']} {issue.get('impact', '')} {host if host != '*' else ''}"
+    
+    def create_tickets_for_issues(self, analysis: Dict) -> List[Dict]:
+        """Create ServiceNow tickets for identified issues"""
+        created_tickets = []
+        
+        if not analysis.get('issues_found'):
+            return created_tickets
+        
+        self.servicenow.ticket_cache.sync()
+        if self.knowledge_base:
+            self.knowledge_base.refresh()
+        
+        # Repeat breaches update their open ticket instead of filing a new one
+        untracked_issues = self.lifecycle.absorb(analysis.get('issues', []))
+        fresh_issues = [issue for issue in untracked_issues if not self._has_recent_ticket(issue)]
+        
+        # One ticket per correlated group instead of one per metric, most severe first
+        groups = self.correlator.correlate(fresh_issues)
+        self.renderer.begin_cycle(analysis)
+        results = self.dispatcher.dispatch([
+            {
+                'severity': group['severity'],
+                'detected_at': min(issue.get('detected_at', time.time()) for issue in group['issues']),
+                'run': lambda group=group: self._file_group_ticket(group, analysis),
+                # A write that never returned may still land; the next cycle adopts it by correlation_id
+                'degraded': (None, 'incident', f"{len(group['issues'])} issue(s) on {', '.join(sorted(group['hosts']))} (timed out)")
+            }
+            for group in groups
+        ])
+        
+        for group, (ticket, table, label) in zip(groups, results):
             if ticket:
-                logger.info(f"🎫 Created incident {ticket['number']} for {issue['metric']}")
-                created_tickets.append(ticket)
+                problem = ticket.get('problem')
+                linked = f" (parent problem {problem['number']})" if problem else ''
+                logger.info(f"🎫 Created {table} {ticket['number']}{linked} for {label}")
+                created_tickets.extend([ticket, problem] if problem else [ticket])
+                self.lifecycle.track(ticket, group['issues'], table)
+                if self.history:
+                    hosts, metrics = sorted(group['hosts']), [issue['metric'] for issue in group['issues']]
+                    self.history.record_ticket(ticket['number'], table, 'created', group['severity'], hosts, metrics)
+                    if problem:
+                        self.history.record_ticket(problem['number'], 'problem', 'created', group['severity'], hosts, metrics)
             else:
-                logger.error(f"❌ Failed to create ticket for {issue['metric']}")
+                logger.error(f"❌ Failed to create ticket for {label}")
         
         return created_tickets
     
+    def _file_group_ticket(self, group: Dict, analysis: Dict) -> tuple:
+        """File the ticket for one correlated group; returns (ticket, table, label)"""
+        if len(group['issues']) == 1:
+            issue = group['issues'][0]
+            return self.servicenow.create_incident(self._build_issue_ticket(issue, analysis)), 'incident', issue['metric']
+        
+        ticket_data = self._build_group_ticket(group, analysis)
+        label = f"{len(group['issues'])} correlated issues ({', '.join(i['metric'] for i in group['issues'])})"
+        if group['ticket_type'] != 'problem':
+            return self.servicenow.create_incident(ticket_data), 'incident', label
+        
+        # Large groups also get a parent problem; the linked incident carries the outage
+        # itself, so it is updated and auto-resolved like any other incident
+        problem = self.servicenow.create_problem(ticket_data)
+        if problem:
+            ticket_data['problem_id'] = problem['sys_id']
+        else:
+            logger.warning(f"⚠️ Parent problem creation failed for {label} - filing the incident alone")
+        
+        incident = self.servicenow.create_incident(ticket_data)
+        if incident and problem:
+            incident['problem'] = problem
+        return incident, 'incident', label
+    
+    def _has_recent_ticket(self, issue: Dict) -> bool:
+        """Check for a similar open incident created in the last hour"""
+        # Served from the local ticket cache; resolved incidents and parent problems don't
+        # count, so a breach after an auto-resolve files (and tracks) a new incident
+        recent_tickets = self.servicenow.ticket_cache.find_recent(issue['metric'], max_age_seconds=3600)
+        
+        if recent_tickets:
+            logger.info(f"⏭️ Skipping duplicate ticket for {issue['metric']} (recent: {recent_tickets[0]['number']})")
+            return True
+        if not self.knowledge_base:
+            return False
+        
+        # Differently worded tickets for the same problem, matched by similarity
+        current_time = datetime.now(timezone.utc)
+        for match in self.knowledge_base.query(self._issue_text(issue), min_similarity=self.knowledge_base.dedup_similarity):
+            if match['table'] != 'incident':
+                continue
+            is_open = self.servicenow.ticket_cache.is_open(match['number'])
+            if is_open is None:
+                is_open = match['state'] not in TicketStateCache.CLOSED_STATES
+            created_time = parse_servicenow_time(match['sys_created_on'])
+            if is_open and created_time and (current_time - created_time).total_seconds() < 3600:
+                logger.info(f"⏭️ Skipping duplicate ticket for {issue['metric']} "
+                            f"(similar: {match['number']}, {match['similarity']:.2f})")
+                return True
+        
+        return False
+    
+    def _build_issue_ticket(self, issue: Dict, analysis: Dict) -> Dict:
+        """Build ticket data for a single issue"""
+        ai_insights = issue.get('ai_insights') or analysis.get('ai_insights', {})
+        
+        ticket = self.renderer.render_issue(issue, ai_insights)
+        ticket.update({
+            'correlation_id': TicketLifecycleManager.correlation_id([issue.get('host', '*')]),
+            'urgency': issue['severity'],
+            'impact': issue['severity'],
+            'technical_details': issue['description'],
+            'recommended_actions': issue['actions']
+        })
+        return ticket
+    
+    def _build_group_ticket(self, group: Dict, analysis: Dict) -> Dict:
+        """Build one ticket covering a group of correlated issues"""
+        issues = group['issues']
+        ai_insights = issues[0].get('ai_insights') or analysis.get('ai_insights', {})
+        
+        linked_issues = '\n'.join(
+            f"- [{issue['severity'].upper()}] {issue['metric']} on {issue.get('host', '*')}: {issue['description']}"
+            for issue in issues
+        )
+        actions = '\n'.join(f"- {issue['metric']}: {issue['actions']}" for issue in issues)
+        
+        ticket = self.renderer.render_group(group, linked_issues, actions, ai_insights)
+        ticket.update({
+            'correlation_id': TicketLifecycleManager.correlation_id(group['hosts']),
+            'urgency': group['severity'],
+            'impact': group['severity'],
+            'technical_details': linked_issues,
+            'recommended_actions': actions
+        })
+        return ticket
+    
     def run_monitoring_cycle(self):
         """Run single monitoring cycle"""
+        self.reload_config()
+        calls_before = self.api_calls
+        with self.profiler.cycle('itsm_cycle'):
+            analysis = self._run_monitoring_cycle()
+        if self.scheduler:
+            self.scheduler.update(analysis, self.analyzer.thresholds, self.api_calls - calls_before)
+        return analysis
+    
+    def _run_monitoring_cycle(self):
+        """Monitoring cycle steps (timed as profiler spans)"""
         logger.info("🔍 Starting ITSM monitoring cycle...")
         
         # Collect metrics
-        metrics = self.collect_metrics()
+        with self.profiler.span('collect_metrics'):
+            metrics = self.collect_metrics()
         logger.info(f"📊 Collected metrics: {metrics}")
         
         # Analyze for issues
-        analysis = self.analyzer.analyze_metrics(metrics)
+        with self.profiler.span('analyze_metrics'):
+            analysis = self.analyze_collected(metrics)
         
         if analysis['issues_found']:
             logger.warning(f"🚨 {analysis['issue_count']} issues detected (severity: {analysis['highest_severity']})")
@@ -414,31 +3055,63 @@ This ticket was automatically created by the AI Infrastructure Monitoring Agent.
                 logger.warning(f"   - {issue['metric']}: {issue['current_value']:.2f} ({issue['severity']})")
             
             # Enhance with AI if available
-            analysis = self.enhance_analysis_with_ai(analysis)
+            with self.profiler.span('enhance_analysis_with_ai'):
+                analysis = self.enhance_analysis_with_ai(analysis)
             
             # Create ServiceNow tickets
-            created_tickets = self.create_tickets_for_issues(analysis)
+            with self.profiler.span('create_tickets_for_issues'):
+                created_tickets = self.create_tickets_for_issues(analysis)
             
             if created_tickets:
                 logger.info(f"✅ Created {len(created_tickets)} ServiceNow tickets")
                 for ticket in created_tickets:
                     logger.info(f"   🎫 {ticket['number']}")
             else:
-                logger.warning("⚠️ Issues detected but no tickets created (duplicates or creation failed)")
+                logger.warning("⚠️ Issues detected but no new tickets created (open ticket updated, duplicates or creation failed)")
         else:
             logger.info("✅ No issues detected - system healthy")
         
+        # Coalesced in-place updates and auto-resolve on recovery
+        with self.profiler.span('ticket_lifecycle'):
+            lifecycle_stats = self.lifecycle.process_cycle(analysis)
+        
+        if self.history:
+            with self.profiler.span('history'):
+                self.history.record_cycle(analysis)
+                for entry, outcome in lifecycle_stats['outcomes']:
+                    hosts = sorted({key.split('|', 1)[0] for key in entry['keys']})
+                    metrics = sorted({key.split('|', 1)[1] for key in entry['keys']})
+                    self.history.record_ticket(entry['number'], entry['table'], outcome, entry['severity'], hosts, metrics)
+                self.history.maybe_flush()
+        if self.baseline:
+            with self.profiler.span('baseline_checkpoint'):
+                self.baseline.maybe_checkpoint()
+        
+        if self.llm_pool and self.llm_pool.stats['calls']:
+            stats = self.llm_pool.stats
+            logger.info(f"🧠 LLM usage: {stats['calls']} calls ({stats['coalesced']} coalesced), "
+                        f"{stats['prompt_tokens'] + stats['completion_tokens']} tokens, "
+                        f"avg {stats['latency_total'] / stats['calls']:.2f}s")
+        
+        if self.state_store:
+            with self.profiler.span('state_snapshot'):
+                self.llm_cache.prune()
+                self.state_store.maybe_save()
+        
         return analysis
     
     def run_continuous_monitoring(self):
         """Run continuous monitoring"""
         logger.info(f"🚀 Starting ITSM Agent (interval: {self.monitoring_interval}s)")
         
-        # Test connections
+        # Test connections (Datadog is only required when it is the metric source)
         if not self.datadog.get_metric('system.cpu.user'):
-            logger.error("❌ Datadog connection failed")
-            return
-        logger.info("✅ Datadog connection successful")
+            if not self.local_metrics:
+                logger.error("❌ Datadog connection failed")
+                return
+            logger.warning("⚠️ Datadog connection failed - relying on local metrics only")
+        else:
+            logger.info("✅ Datadog connection successful")
         
         if not self.servicenow.test_connection():
             logger.error("❌ ServiceNow connection failed")
@@ -447,19 +3120,206 @@ This ticket was automatically created by the AI Infrastructure Monitoring Agent.
         while True:
             try:
                 self.run_monitoring_cycle()
-                logger.info(f"😴 Sleeping for {self.monitoring_interval} seconds...")
-                time.sleep(self.monitoring_interval)
+                logger.info(f"😴 Sleeping for {self.next_interval:.0f} seconds...")
+                time.sleep(self.next_interval)
                 
             except KeyboardInterrupt:
                 logger.info("🛑 Monitoring stopped by user")
+                if self.state_store:
+                    self.state_store.save()
+                if self.knowledge_base:
+                    self.knowledge_base.save_checkpoint()
+                if self.history:
+                    self.history.flush()
                 break
             except Exception as e:
                 logger.error(f"💥 Error in monitoring cycle: {e}")
                 time.sleep(60)
 
+def load_tenant_registry(path: str) -> List[Dict]:
+    """Load tenant definitions from a JSON registry file
+    
+    String values of the form "env:NAME" are read from the environment so
+    credentials can stay out of the registry file.
+    """
+    with open(path) as f:
+        registry = json.load(f)
+    
+    required = ['name', 'servicenow_url', 'servicenow_user', 'servicenow_password',
+                'datadog_api_key', 'datadog_app_key']
+    tenants = []
+    
+    for tenant in registry.get('tenants', []):
+        resolved = {
+            key: os.getenv(value[4:], '') if isinstance(value, str) and value.startswith('env:') else value
+            for key, value in tenant.items()
+        }
+        missing = [key for key in required if not resolved.get(key)]
+        if missing:
+            raise ValueError(f"Tenant {tenant.get('name', '?')} missing: {', '.join(missing)}")
+        tenants.append(resolved)
+    
+    names = [tenant['name'] for tenant in tenants]
+    if len(names) != len(set(names)):
+        raise ValueError("Tenant names must be unique")
+    
+    return tenants
+
+class MultiTenantAgentHost:
+    """Run many tenants' ITSM agents inside one process and one event loop"""
+    
+    def __init__(self, tenants: List[Dict], max_concurrent_cycles: int = 4, openai_api_key: str = None,
+                 api_budget_per_hour: Optional[float] = None):
+        self.max_concurrent_cycles = max_concurrent_cycles
+        self.api_budget = ApiCallBudget(api_budget_per_hour) if api_budget_per_hour else None
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent_cycles, thread_name_prefix='tenant')
+        self.agents = {}  # tenant name -> ITSMAgent (own clients, caches and dedup state)
+        
+        for tenant in tenants:
+            self.agents[tenant['name']] = self._build_agent(tenant, openai_api_key)
+        
+        logger.info(f"🏢 Loaded {len(self.agents)} tenants (max {max_concurrent_cycles} concurrent cycles)")
+    
+    def _build_agent(self, tenant: Dict, openai_api_key: str = None) -> ITSMAgent:
+        """Create a tenant's agent with its own pooled, rate-limited sessions"""
+        limits = tenant.get('rate_limits', {})
+        
+        return ITSMAgent(
+            servicenow_url=tenant['servicenow_url'],
+            servicenow_user=tenant['servicenow_user'],
+            servicenow_password=tenant['servicenow_password'],
+            datadog_api_key=tenant['datadog_api_key'],
+            datadog_app_key=tenant['datadog_app_key'],
+            datadog_site=tenant.get('datadog_site', 'datadoghq.com'),
+            openai_api_key=tenant.get('openai_api_key', openai_api_key),
+            monitoring_interval=int(tenant.get('monitoring_interval', 600)),
+            correlation_window=int(tenant.get('correlation_window', 300)),
+            problem_threshold=int(tenant.get('problem_threshold', 3)),
+            healthy_period=int(tenant.get('healthy_period', 1800)),
+            update_every=int(tenant.get('update_every', 3)),
+            baseline_anomalies=bool(tenant.get('baseline_anomalies', False)),
+            baseline_checkpoint=self._tenant_path(tenant, 'baseline_checkpoint'),
+            state_snapshot=self._tenant_path(tenant, 'state_snapshot'),
+            latency_budgets=tenant.get('latency_budgets'),
+            ticket_templates=self._load_templates(tenant.get('ticket_templates')),
+            profile_threshold=float(tenant.get('profile_threshold', 120)),
+            profile_dir=os.path.join(tenant.get('profile_dir', 'cycle_profiles'), tenant['name']),
+            config_path=tenant.get('config_path'),
+            metrics_source=tenant.get('metrics_source', 'datadog'),
+            adaptive_interval=bool(tenant.get('adaptive_interval', False)),
+            min_interval=int(tenant.get('min_interval', 60)),
+            max_interval=tenant.get('max_interval'),
+            api_budget=self.api_budget,
+            scope_name=tenant['name'],
+            history_dir=os.path.join(tenant['history_dir'], tenant['name']) if tenant.get('history_dir') else None,
+            history_retention_days=int(tenant.get('history_retention_days', 30)),
+            knowledge_base_index=bool(tenant.get('knowledge_base', False)),
+            knowledge_base_checkpoint=self._tenant_path(tenant, 'knowledge_base_checkpoint'),
+            llm_concurrency=int(tenant.get('llm_concurrency', 4)),
+            servicenow_session=RateLimitedSession(float(limits.get('servicenow', 5)), burst=10),
+            datadog_session=RateLimitedSession(float(limits.get('datadog', 10)), burst=20)
+        )
+    
+    def _tenant_path(self, tenant: Dict, key: str) -> Optional[str]:
+        """Per-tenant state file: state.pkl -> state.<tenant>.pkl, so tenants sharing a setting never clobber each other"""
+        path = tenant.get(key)
+        if not path:
+            return None
+        root, ext = os.path.splitext(path)
+        return f"{root}.{tenant['name']}{ext}"
+    
+    def _load_templates(self, templates) -> Optional[Dict]:
+        """Tenant ticket templates: inline dict or path to a JSON file"""
+        if isinstance(templates, str):
+            with open(templates) as f:
+                return json.load(f)
+        return templates
+    
+    async def run(self):
+        """Schedule tenant cycles fairly: earliest-due first, one in-flight cycle per tenant"""
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.max_concurrent_cycles)
+        
+        # (next due time, sequence, tenant name) - the sequence breaks ties round-robin
+        due = [(loop.time(), seq, name) for seq, name in enumerate(self.agents)]
+        heapq.heapify(due)
+        sequence = len(due)
+        wakeup = asyncio.Event()
+        
+        async def run_cycle(name: str):
+            nonlocal sequence
+            try:
+                await loop.run_in_executor(self.executor, self.agents[name].run_monitoring_cycle)
+            except Exception as e:
+                logger.error(f"💥 [{name}] Error in monitoring cycle: {e}")
+            finally:
+                slots.release()
+                # Read after the cycle so hot-reloaded intervals take effect
+                heapq.heappush(due, (loop.time() + self.agents[name].next_interval, sequence, name))
+                sequence += 1
+                wakeup.set()
+        
+        while True:
+            if not due:
+                # Every tenant has a cycle in flight
+                wakeup.clear()
+                await wakeup.wait()
+                continue
+            
+            next_due, _, name = due[0]
+            delay = next_due - loop.time()
+            if delay > 0:
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            
+            await slots.acquire()
+            heapq.heappop(due)
+            logger.info(f"🔍 [{name}] Starting tenant cycle")
+            loop.create_task(run_cycle(name))
+    
+    def run_forever(self):
+        """Run the host until interrupted"""
+        for name, agent in self.agents.items():
+            if not agent.servicenow.test_connection():
+                logger.warning(f"⚠️ [{name}] ServiceNow connection failed - cycles will keep retrying")
+        
+        try:
+            asyncio.run(self.run())
+        except KeyboardInterrupt:
+            logger.info("🛑 Multi-tenant host stopped by user")
+            for agent in self.agents.values():
+                if agent.state_store:
+                    agent.state_store.save()
+                if agent.history:
+                    agent.history.flush()
+                if agent.knowledge_base:
+                    agent.knowledge_base.save_checkpoint()
+        finally:
+            self.executor.shutdown(wait=False)
+
 def main():
     """Main function"""
     
+    # Multi-tenant mode: one process serving every tenant in the registry
+    tenant_registry = os.getenv('TENANT_REGISTRY')
+    if tenant_registry:
+        try:
+            tenants = load_tenant_registry(tenant_registry)
+            host = MultiTenantAgentHost(
+                tenants,
+                max_concurrent_cycles=int(os.getenv('MAX_CONCURRENT_CYCLES', '4')),
+                openai_api_key=os.getenv('OPENAI_API_KEY'),
+                api_budget_per_hour=float(os.getenv('API_BUDGET_PER_HOUR', '0')) or None
+            )
+            host.run_forever()
+        except Exception as e:
+            logger.error(f"❌ Failed to start multi-tenant host: {e}")
+        return
+    
     # Environment variables
     servicenow_url = os.getenv('SERVICENOW_INSTANCE', 'https://dev221843.service-now.com')
     servicenow_user = os.getenv('SERVICENOW_USER')
@@ -471,6 +3331,36 @@ def main():
     
     openai_api_key = os.getenv('OPENAI_API_KEY')  # Optional
     monitoring_interval = int(os.getenv('MONITORING_INTERVAL', '600'))
+    correlation_window = int(os.getenv('CORRELATION_WINDOW', '300'))
+    problem_threshold = int(os.getenv('CORRELATION_PROBLEM_THRESHOLD', '3'))
+    healthy_period = int(os.getenv('RESOLVE_HEALTHY_PERIOD', '1800'))
+    update_every = int(os.getenv('UPDATE_COALESCE_CYCLES', '3'))
+    baseline_anomalies = os.getenv('BASELINE_ANOMALIES', 'false').lower() == 'true'
+    baseline_checkpoint = os.getenv('BASELINE_CHECKPOINT')
+    state_snapshot = os.getenv('STATE_SNAPSHOT')
+    llm_concurrency = int(os.getenv('LLM_CONCURRENCY', '4'))
+    profile_threshold = float(os.getenv('PROFILE_THRESHOLD', '120'))
+    profile_dir = os.getenv('PROFILE_DIR', 'cycle_profiles')
+    config_path = os.getenv('AGENT_CONFIG')
+    metrics_source = os.getenv('METRICS_SOURCE', 'datadog')
+    adaptive_interval = os.getenv('ADAPTIVE_INTERVAL', 'false').lower() == 'true'
+    min_interval = int(os.getenv('MIN_INTERVAL', '60'))
+    max_interval = int(os.getenv('MAX_INTERVAL', str(monitoring_interval * 4)))
+    api_budget = float(os.getenv('API_BUDGET_PER_HOUR', '0'))
+    history_dir = os.getenv('HISTORY_DIR')
+    history_retention_days = int(os.getenv('HISTORY_RETENTION_DAYS', '30'))
+    knowledge_base_index = os.getenv('KNOWLEDGE_BASE', 'false').lower() == 'true'
+    knowledge_base_checkpoint = os.getenv('KNOWLEDGE_BASE_CHECKPOINT')
+    ticket_templates = None
+    if os.getenv('TICKET_TEMPLATES'):
+        with open(os.getenv('TICKET_TEMPLATES')) as f:
+            ticket_templates = json.load(f)
+    latency_budgets = {
+        'critical': int(os.getenv('CRITICAL_LATENCY_BUDGET', '30')),
+        'high': int(os.getenv('HIGH_LATENCY_BUDGET', '120')),
+        'medium': 600,
+        'low': 600
+    }
     
     # Validate required variables
     required_vars = {
@@ -490,7 +3380,30 @@ def main():
         print("  - SERVICENOW_INSTANCE (default: https://dev221843.service-now.com)")
         print("  - DATADOG_SITE (default: datadoghq.com)")
         print("  - OPENAI_API_KEY (for AI-enhanced analysis)")
+        print("  - TENANT_REGISTRY (JSON tenant file; runs all tenants in one process)")
         print("  - MONITORING_INTERVAL (default: 600)")
+        print("  - CORRELATION_WINDOW (default: 300)")
+        print("  - CORRELATION_PROBLEM_THRESHOLD (default: 3)")
+        print("  - RESOLVE_HEALTHY_PERIOD (default: 1800)")
+        print("  - UPDATE_COALESCE_CYCLES (default: 3)")
+        print("  - BASELINE_ANOMALIES (true: flag deviations from learned per-host baselines; default: false)")
+        print("  - BASELINE_CHECKPOINT (file to persist anomaly baselines across restarts)")
+        print("  - STATE_SNAPSHOT (file for agent state snapshots / warm restart)")
+        print("  - CRITICAL_LATENCY_BUDGET (default: 30 seconds from detection to ticket)")
+        print("  - HIGH_LATENCY_BUDGET (default: 120)")
+        print("  - LLM_CONCURRENCY (default: 4 concurrent GPT calls)")
+        print("  - TICKET_TEMPLATES (JSON file overriding ticket title/description templates)")
+        print("  - PROFILE_THRESHOLD (default: 120 seconds; slower cycles are profiled)")
+        print("  - PROFILE_DIR (default: cycle_profiles)")
+        print("  - AGENT_CONFIG (JSON config file, reloaded between cycles when it changes)")
+        print("  - METRICS_SOURCE (datadog or local; default: datadog)")
+        print("  - ADAPTIVE_INTERVAL (true: tighten on issues/trends, back off when healthy; default: false)")
+        print("  - MIN_INTERVAL (default: 60) / MAX_INTERVAL (default: 4x MONITORING_INTERVAL)")
+        print("  - API_BUDGET_PER_HOUR (Datadog + ServiceNow calls; default: unlimited)")
+        print("  - HISTORY_DIR (columnar cycle history for analytical queries)")
+        print("  - HISTORY_RETENTION_DAYS (default: 30)")
+        print("  - KNOWLEDGE_BASE (true: index past tickets for similarity dedup and LLM context; default: false)")
+        print("  - KNOWLEDGE_BASE_CHECKPOINT (file to persist the similar-ticket index across restarts)")
         return
     
     logger.info("🎫 Starting Complete ITSM AI Agent...")
@@ -506,7 +3419,29 @@ def main():
             datadog_app_key=datadog_app_key,
             datadog_site=datadog_site,
             openai_api_key=openai_api_key,
-            monitoring_interval=monitoring_interval
+            monitoring_interval=monitoring_interval,
+            correlation_window=correlation_window,
+            problem_threshold=problem_threshold,
+            healthy_period=healthy_period,
+            update_every=update_every,
+            baseline_anomalies=baseline_anomalies,
+            baseline_checkpoint=baseline_checkpoint,
+            state_snapshot=state_snapshot,
+            latency_budgets=latency_budgets,
+            llm_concurrency=llm_concurrency,
+            ticket_templates=ticket_templates,
+            profile_threshold=profile_threshold,
+            profile_dir=profile_dir,
+            config_path=config_path,
+            metrics_source=metrics_source,
+            adaptive_interval=adaptive_interval,
+            min_interval=min_interval,
+            max_interval=max_interval,
+            api_budget=ApiCallBudget(api_budget) if api_budget else None,
+            history_dir=history_dir,
+            history_retention_days=history_retention_days,
+            knowledge_base_index=knowledge_base_index,
+            knowledge_base_checkpoint=knowledge_base_checkpoint
         )
         
         agent.run_continuous_monitoring()
@@ -0,0 +1,575 @@
+#!/usr/bin/env python3
+"""
+Mock ServiceNow and Datadog Servers
+In-process Table API and metrics query API servers with fault injection,
+plus a load-test harness that drives the agents' clients against them
+"""
+
+import os
+import re
+import json
+import base64
+import math
+import time
+import uuid
+import zlib
+import random
+import logging
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from complete_itsm_agent import ServiceNowClient, DatadogClient, ITSMAgent, iter_table_records
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class MockAPIServer:
+    """Threaded local HTTP server with injected latency, errors and 429 rate limiting
+
+    Subclasses implement handle(method, path, params, body, headers) -> (status, payload).
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, rate_limit: Optional[float] = None, rate_burst: int = 20,
+                 seed: Optional[int] = None):
+        self.latency = latency  # Mean added response time in seconds
+        self.jitter = jitter  # +/- fraction of latency
+        self.error_rate = error_rate  # Fraction of requests answered with HTTP 500
+        self.rate_limit = rate_limit  # Requests per second before HTTP 429 (None = unlimited)
+        self.rate_burst = rate_burst
+        self.random = random.Random(seed)
+
+        self.tokens = float(rate_burst)
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'status': {}}
+
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MockAPIServer':
+        """Serve requests on a background thread"""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name=type(self).__name__, daemon=True)
+        self.thread.start()
+        logger.info(f"🧪 {type(self).__name__} listening on {self.url}")
+        return self
+
+    def stop(self):
+        """Shut the server down"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {'requests': 0, 'status': {}}
+
+    def handle(self, method: str, path: str, params: Dict, body: Optional[Dict],
+               headers: Optional[Dict] = None) -> Tuple[int, Optional[Dict]]:
+        raise NotImplementedError
+
+    def _take_token(self) -> bool:
+        """Token bucket for the simulated server-side rate limit"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate_burst, self.tokens + (now - self.last_refill) * self.rate_limit)
+            self.last_refill = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def _serve(self, method: str, raw_path: str, raw_body: bytes,
+               request_headers: Optional[Dict] = None) -> Tuple[int, Optional[Dict], Dict]:
+        """Apply fault injection, then route to handle()"""
+        if self.latency:
+            time.sleep(max(0.0, self.latency * (1 + self.random.uniform(-self.jitter, self.jitter))))
+
+        headers = {}
+        if self.rate_limit and not self._take_token():
+            status, payload = 429, {'error': {'message': 'Rate limit exceeded'}}
+            headers['Retry-After'] = str(max(1, math.ceil(1 / self.rate_limit)))
+        elif self.error_rate and self.random.random() < self.error_rate:
+            status, payload = 500, {'error': {'message': 'Injected server error'}}
+        else:
+            parsed = urlparse(raw_path)
+            params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+            try:
+                body = json.loads(raw_body) if raw_body else None
+                status, payload = self.handle(method, parsed.path, params, body, request_headers or {})
+            except Exception as e:
+                status, payload = 400, {'error': {'message': str(e)}}
+
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats['status'][status] = self.stats['status'].get(status, 0) + 1
+        return status, payload, headers
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # Keep-alive, like the real APIs
+            disable_nagle_algorithm = True  # Headers and body go out in separate writes
+
+            def _respond(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                status, payload, headers = server._serve(self.command, self.path, self.rfile.read(length),
+                                                         dict(self.headers))
+                data = json.dumps(payload).encode() if payload is not None else b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _respond
+
+            def log_message(self, format, *args):
+                pass  # Request logging would dominate load-test time
+
+        return Handler
+
+class MockServiceNowServer(MockAPIServer):
+    """ServiceNow Table API (/api/now/table) backed by in-memory tables"""
+
+    PREFIXES = {'incident': 'INC', 'problem': 'PRB', 'change_request': 'CHG'}
+    QUERY_TERM = re.compile(r'^([A-Za-z0-9_.]+?)(!=|>=|<=|NOTLIKE|LIKE|STARTSWITH|NOTIN|IN|=|>|<)(.*)$')
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.tables = {table: {} for table in self.PREFIXES}
+        self.counters = {table: 10000 for table in self.PREFIXES}
+
+    def seed_tickets(self, count: int, hosts: List[str], table: str = 'incident', closed_fraction: float = 0.8):
+        """Populate a table with synthetic monitoring tickets"""
+        titles = ['High CPU Usage', 'Low Memory Available', 'High Disk Usage', 'High System Load']
+        for _ in range(count):
+            host = self.random.choice(hosts)
+            self._insert(table, {
+                'short_description': f"{self.random.choice(titles)} - {host}",
+                'description': f"Synthetic monitoring ticket for {host}",
+                'urgency': self.random.choice(['1', '2', '3']),
+                'impact': self.random.choice(['1', '2', '3']),
+                'category': 'Infrastructure',
+                'subcategory': 'Monitoring',
+                'state': '7' if self.random.random() < closed_fraction else '1'
+            })
+
+    def handle(self, method: str, path: str, params: Dict, body: Optional[Dict],
+               headers: Optional[Dict] = None) -> Tuple[int, Optional[Dict]]:
+        parts = path.strip('/').split('/')
+        if parts[:3] != ['api', 'now', 'table'] or len(parts) not in (4, 5):
+            return 404, {'error': {'message': 'Invalid table API path'}}
+
+        table = parts[3]
+        records = self.tables.setdefault(table, {})
+        fields = [field for field in params.get('sysparm_fields', '').split(',') if field]
+
+        if len(parts) == 4:
+            if method == 'GET':
+                return 200, {'result': [self._project(r, fields) for r in self._query(records, params)]}
+            if method == 'POST':
+                return 201, {'result': self._project(self._insert(table, body or {}, self._user(headers)), fields)}
+            return 405, {'error': {'message': f'{method} not allowed on a table'}}
+
+        record = records.get(parts[4])
+        if record is None:
+            return 404, {'error': {'message': 'No Record found'}}
+        if method == 'GET':
+            return 200, {'result': self._project(record, fields)}
+        if method in ('PATCH', 'PUT'):
+            with self.lock:
+                record.update({key: str(value) for key, value in (body or {}).items()})
+                record['sys_updated_on'] = self._now()
+            return 200, {'result': self._project(record, fields)}
+        if method == 'DELETE':
+            with self.lock:
+                records.pop(parts[4], None)
+            return 204, None
+        return 405, {'error': {'message': f'{method} not allowed on a record'}}
+
+    @staticmethod
+    def _user(headers: Optional[Dict]) -> str:
+        """User name from Basic auth (recorded as sys_created_by, like the instance does)"""
+        authorization = (headers or {}).get('Authorization', '')
+        if not authorization.startswith('Basic '):
+            return 'guest'
+        return base64.b64decode(authorization[6:]).decode().split(':', 1)[0]
+
+    def _insert(self, table: str, data: Dict, user: str = 'admin') -> Dict:
+        now = self._now()
+        with self.lock:
+            self.counters[table] = self.counters.get(table, 10000) + 1
+            record = {key: str(value) for key, value in data.items()}
+            record.update({
+                'sys_id': uuid.uuid4().hex,
+                'number': f"{self.PREFIXES.get(table, 'TKT')}{self.counters[table]:07d}",
+                'sys_created_on': now,
+                'sys_updated_on': now,
+                'sys_created_by': user,
+                'opened_at': now
+            })
+            self.tables.setdefault(table, {})[record['sys_id']] = record
+        return record
+
+    def _query(self, records: Dict, params: Dict) -> List[Dict]:
+        """Apply an encoded query (AND terms, ORDERBY/ORDERBYDESC), offset and limit"""
+        terms, order = [], []
+        for clause in filter(None, params.get('sysparm_query', '').split('^')):
+            if clause.startswith('ORDERBYDESC'):
+                order.append((clause[11:], True))
+            elif clause.startswith('ORDERBY'):
+                order.append((clause[7:], False))
+            else:
+                match = self.QUERY_TERM.match(clause)
+                if not match:
+                    raise ValueError(f"Unsupported query term: {clause}")
+                terms.append(match.groups())
+
+        with self.lock:
+            matched = [r for r in records.values() if all(self._matches(r, *term) for term in terms)]
+        for field, descending in reversed(order):
+            matched.sort(key=lambda r: r.get(field, ''), reverse=descending)
+
+        offset = int(params.get('sysparm_offset', 0))
+        limit = int(params.get('sysparm_limit', 10000))
+        return matched[offset:offset + limit]
+
+    @staticmethod
+    def _matches(record: Dict, field: str, op: str, value: str) -> bool:
+        actual = record.get(field, '')
+        if op == '=':
+            return actual == value
+        if op == '!=':
+            return actual != value
+        if op == 'LIKE':
+            return value.lower() in actual.lower()
+        if op == 'NOTLIKE':
+            return value.lower() not in actual.lower()
+        if op == 'STARTSWITH':
+            return actual.startswith(value)
+        if op == 'IN':
+            return actual in value.split(',')
+        if op == 'NOTIN':
+            return actual not in value.split(',')
+        # Ordered comparisons are lexicographic (matches sys_id and timestamp formats)
+        return {'>': actual > value, '>=': actual >= value, '<': actual < value, '<=': actual <= value}[op]
+
+    @staticmethod
+    def _project(record: Dict, fields: List[str]) -> Dict:
+        return {field: record.get(field, '') for field in fields} if fields else dict(record)
+
+    @staticmethod
+    def _now() -> str:
+        return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+class MockDatadogServer(MockAPIServer):
+    """Datadog metrics query API (/api/v1/query) over a synthetic fleet
+
+    Values are deterministic per (host, metric, timestamp): a daily sine wave
+    plus hash noise, with a fraction of hosts pinned in a degraded state.
+    """
+
+    # metric: (base, amplitude, degraded value) in the units the analyzer expects
+    PROFILES = {
+        'system.cpu.user': (35.0, 15.0, 96.0),
+        'system.mem.pct_usable': (60.0, 15.0, 4.0),
+        'system.disk.in_use': (0.55, 0.1, 0.97),
+        'system.load.1': (1.5, 1.0, 12.0)
+    }
+    QUERY = re.compile(r'^(\w+):([\w.]+)\{([^}]*)\}(?:\s*by\s*\{(\w+)\})?$')
+    AGGREGATORS = {
+        'avg': lambda values: sum(values) / len(values),
+        'sum': sum,
+        'min': min,
+        'max': max
+    }
+
+    def __init__(self, fleet_size: int = 10, degraded_fraction: float = 0.0, interval: int = 60,
+                 host_prefix: str = 'host', **kwargs):
+        super().__init__(**kwargs)
+        self.interval = interval
+        self.hosts = [f"{host_prefix}-{i:05d}" for i in range(fleet_size)]
+        self.degraded = set(self.hosts[:int(round(fleet_size * degraded_fraction))])
+        self._fleet_cache = {}  # (aggregator, metric, timestamp) -> fleet-wide value
+
+    def value(self, host: str, metric: str, timestamp: int) -> float:
+        """Synthetic sample for one host"""
+        base, amplitude, degraded = self.PROFILES.get(metric, (50.0, 10.0, 99.0))
+        if host in self.degraded:
+            return degraded
+        seed = zlib.crc32(f"{host}|{metric}".encode())
+        phase = (seed % 1000) / 1000 * 2 * math.pi
+        noise = (zlib.crc32(f"{seed}|{timestamp}".encode()) % 1000 / 1000 - 0.5) * amplitude * 0.2
+        return max(0.0, base + amplitude * math.sin(2 * math.pi * timestamp / 86400 + phase) + noise)
+
+    def handle(self, method: str, path: str, params: Dict, body: Optional[Dict],
+               headers: Optional[Dict] = None) -> Tuple[int, Optional[Dict]]:
+        if path != '/api/v1/query' or method != 'GET':
+            return 404, {'errors': ['Not found']}
+
+        query = params.get('query', '')
+        match = self.QUERY.match(query.replace(' ', ''))
+        if not match:
+            return 400, {'errors': [f"Unsupported query: {query}"]}
+        aggregator, metric, scope, group_by = match.groups()
+        if aggregator not in self.AGGREGATORS:
+            return 400, {'errors': [f"Unsupported aggregator: {aggregator}"]}
+
+        start, end = int(params['from']), int(params['to'])
+        timestamps = list(range(start - start % self.interval + self.interval, end + 1, self.interval))
+        hosts = self._scope_hosts(scope)
+
+        if group_by == 'host':
+            series = [self._series(query, metric, f"host:{host}", timestamps, lambda ts, h=host: self.value(h, metric, ts))
+                      for host in hosts]
+        elif not hosts or not timestamps:
+            series = []
+        else:
+            reduce = self.AGGREGATORS[aggregator]
+            fleet_wide = scope in ('', '*')
+
+            def point(ts):
+                key = (aggregator, metric, ts)
+                if fleet_wide and key in self._fleet_cache:
+                    return self._fleet_cache[key]
+                value = reduce([self.value(host, metric, ts) for host in hosts])
+                if fleet_wide:
+                    self._fleet_cache[key] = value
+                return value
+
+            series = [self._series(query, metric, scope or '*', timestamps, point)]
+
+        return 200, {
+            'status': 'ok',
+            'res_type': 'time_series',
+            'query': query,
+            'from_date': start * 1000,
+            'to_date': end * 1000,
+            'series': series
+        }
+
+    def _scope_hosts(self, scope: str) -> List[str]:
+        """Hosts selected by a {*} / {host:name,...} scope"""
+        if scope in ('', '*'):
+            return self.hosts
+        wanted = {tag.split(':', 1)[1] for tag in scope.split(',') if tag.startswith('host:')}
+        return [host for host in self.hosts if host in wanted]
+
+    def _series(self, query: str, metric: str, scope: str, timestamps: List[int], value: Callable) -> Dict:
+        return {
+            'metric': metric,
+            'expression': query,
+            'scope': scope,
+            'tag_set': [] if scope == '*' else scope.split(','),
+            'interval': self.interval,
+            'length': len(timestamps),
+            'pointlist': [[ts * 1000, value(ts)] for ts in timestamps]
+        }
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+class LoadTestHarness:
+    """Drive the agents' API clients against mock servers and report throughput and tail latency
+
+    Each scenario is a factory called once per worker thread (so clients and
+    sessions are not shared across threads) that returns an operation. An
+    operation returning a falsy value counts as an error.
+    """
+
+    def __init__(self, servicenow: MockServiceNowServer, datadog: MockDatadogServer,
+                 concurrency: int = 8, duration: float = 10.0):
+        self.servicenow = servicenow
+        self.datadog = datadog
+        self.concurrency = concurrency
+        self.duration = duration
+        self.scenarios = {
+            'servicenow_create': self._servicenow_create,
+            'servicenow_search': self._servicenow_search,
+            'datadog_query': self._datadog_query,
+            'agent_cycle': self._agent_cycle,
+            'langchain_tools': self._langchain_tools
+        }
+
+    def _servicenow_client(self) -> ServiceNowClient:
+        return ServiceNowClient(self.servicenow.url, 'load', 'test')
+
+    def _datadog_client(self) -> DatadogClient:
+        client = DatadogClient('load', 'test')
+        client.base_url = self.datadog.url
+        return client
+
+    def _servicenow_create(self) -> Callable:
+        client = self._servicenow_client()
+        return lambda: client.create_incident({'title': f"Load test - {random.choice(self.datadog.hosts)}",
+                                               'urgency': 'low', 'impact': 'low'})
+
+    def _servicenow_search(self) -> Callable:
+        client = self._servicenow_client()
+        return lambda: list(iter_table_records(client.instance_url, client.headers, 'incident',
+                                               query='short_descriptionLIKEHigh CPU^state!=7',
+                                               fields='number,short_description,state', page_size=50,
+                                               max_results=100, session=client.session)) is not None
+
+    def _datadog_query(self) -> Callable:
+        client = self._datadog_client()
+        metrics = list(MockDatadogServer.PROFILES)
+        return lambda: client.get_metric(random.choice(metrics)) is not None
+
+    def _agent_cycle(self) -> Callable:
+        agent = ITSMAgent(self.servicenow.url, 'load', 'test', 'load', 'test', profile_threshold=3600)
+        agent.datadog.base_url = self.datadog.url
+
+        def cycle():
+            agent.run_monitoring_cycle()
+            return True
+        return cycle
+
+    def _langchain_tools(self) -> Optional[Callable]:
+        try:
+            from servicenow_langchain_agent import ServiceNowTool, DatadogMetricsTool
+        except ImportError as e:
+            logger.warning(f"⚠️ Skipping langchain_tools scenario: {e}")
+            return None
+
+        servicenow_tool = ServiceNowTool(self.servicenow.url, 'load', 'test')
+        datadog_tool = DatadogMetricsTool('load', 'test')
+        object.__setattr__(datadog_tool, 'base_url', self.datadog.url)
+        search = json.dumps({'operation': 'search_tickets', 'table': 'incident', 'query': 'state=1', 'limit': 10})
+
+        def call():
+            return ('Error' not in servicenow_tool._run(search)
+                    and 'Error' not in datadog_tool._run(random.choice(list(MockDatadogServer.PROFILES))))
+        return call
+
+    def run_scenario(self, name: str) -> Optional[Dict]:
+        """Run one scenario for the configured duration and concurrency"""
+        factory = self.scenarios[name]
+        operations = [factory()]
+        if operations[0] is None:
+            return None
+        operations += [factory() for _ in range(self.concurrency - 1)]
+
+        self.servicenow.reset_stats()
+        self.datadog.reset_stats()
+        latencies, errors = [], [0]
+        lock = threading.Lock()
+        deadline = time.monotonic() + self.duration
+
+        def worker(operation):
+            local, failed = [], 0
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    ok = operation()
+                except Exception:
+                    ok = False
+                local.append(time.perf_counter() - start)
+                failed += 0 if ok else 1
+            with lock:
+                latencies.extend(local)
+                errors[0] += failed
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            list(pool.map(worker, operations))
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'scenario': name,
+            'concurrency': self.concurrency,
+            'operations': len(latencies),
+            'errors': errors[0],
+            'throughput_per_s': len(latencies) / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+            'server_requests': self.servicenow.stats['requests'] + self.datadog.stats['requests'],
+            'rate_limited': self.servicenow.stats['status'].get(429, 0) + self.datadog.stats['status'].get(429, 0)
+        }
+
+    def run(self, scenarios: Optional[List[str]] = None) -> List[Dict]:
+        """Run scenarios in order and log a summary line for each"""
+        reports = []
+        for name in scenarios or list(self.scenarios):
+            logger.info(f"🏋️ Running {name} for {self.duration:.0f}s at concurrency {self.concurrency}")
+            report = self.run_scenario(name)
+            if report is None:
+                continue
+            reports.append(report)
+            logger.info(f"📈 {name}: {report['operations']} ops ({report['errors']} errors), "
+                        f"{report['throughput_per_s']:.1f} ops/s, p50 {report['p50_ms']:.1f}ms, "
+                        f"p95 {report['p95_ms']:.1f}ms, p99 {report['p99_ms']:.1f}ms, "
+                        f"{report['rate_limited']} rate-limited of {report['server_requests']} requests")
+        return reports
+
+def main():
+    """Start the mock servers and run the load test"""
+    print("🧪 Mock ServiceNow / Datadog Load Test")
+    print("=" * 50)
+
+    fleet_size = int(os.getenv('MOCK_FLEET_SIZE', '100'))
+    degraded_fraction = float(os.getenv('MOCK_DEGRADED_FRACTION', '0.05'))
+    seed_tickets = int(os.getenv('MOCK_SEED_TICKETS', '1000'))
+    latency = float(os.getenv('MOCK_LATENCY_MS', '20')) / 1000
+    error_rate = float(os.getenv('MOCK_ERROR_RATE', '0'))
+    rate_limit = float(os.getenv('MOCK_RATE_LIMIT', '0')) or None
+    concurrency = int(os.getenv('LOAD_TEST_CONCURRENCY', '8'))
+    duration = float(os.getenv('LOAD_TEST_DURATION', '10'))
+    scenarios = [name for name in os.getenv('LOAD_TEST_SCENARIOS', '').split(',') if name]
+    report_path = os.getenv('LOAD_TEST_REPORT')
+
+    print("Environment variables:")
+    print("  - MOCK_FLEET_SIZE (default: 100)")
+    print("  - MOCK_DEGRADED_FRACTION (default: 0.05)")
+    print("  - MOCK_SEED_TICKETS (default: 1000)")
+    print("  - MOCK_LATENCY_MS (default: 20)")
+    print("  - MOCK_ERROR_RATE (default: 0)")
+    print("  - MOCK_RATE_LIMIT (requests/s before 429, default: unlimited)")
+    print("  - LOAD_TEST_CONCURRENCY (default: 8)")
+    print("  - LOAD_TEST_DURATION (seconds per scenario, default: 10)")
+    print("  - LOAD_TEST_SCENARIOS (comma-separated, default: all)")
+    print("  - LOAD_TEST_REPORT (optional JSON report path)")
+    print()
+
+    fault_options = {'latency': latency, 'jitter': 0.5, 'error_rate': error_rate, 'rate_limit': rate_limit}
+    with MockServiceNowServer(**fault_options) as servicenow, \
+            MockDatadogServer(fleet_size=fleet_size, degraded_fraction=degraded_fraction, **fault_options) as datadog:
+        servicenow.seed_tickets(seed_tickets, datadog.hosts)
+        reports = LoadTestHarness(servicenow, datadog, concurrency, duration).run(scenarios)
+
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump(reports, f, indent=2)
+        logger.info(f"💾 Load test report written to {report_path}")
+
+if __name__ == "__main__":
+    main()
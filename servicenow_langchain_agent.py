@@ -5,11 +5,14 @@ Intelligent ticket creation and management for infrastructure issues
 """
 
 import os
+import re
 import json
+import math
 import time
 import logging
 import requests
 import base64
+import threading
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional, Any
 
@@ -18,14 +21,83 @@ from langchain.agents import create_react_agent, AgentExecutor
 from langchain.tools import BaseTool
 from langchain.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
-from langchain.memory import ConversationBufferWindowMemory
 from langchain import hub
 from pydantic import Field
 
+from complete_itsm_agent import (
+    TicketStateCache, AgentStateStore, InfrastructureAnalyzer, CycleProfiler, AdaptiveScheduler, ApiCallBudget,
+    SeriesStreamDecoder, iter_table_records
+)
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+class ToolCallMemo:
+    """Per-cycle memo of read-only tool results, keyed on normalized tool input
+    
+    Writes invalidate the reads of the table they touch. Only serves results
+    between begin_cycle() and end_cycle(), so nothing outlives the cycle.
+    """
+    
+    def __init__(self):
+        self.entries = {}  # (tool, table, normalized input) -> result
+        self.hits = {}
+        self.misses = {}
+        self.active = False
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def normalize(tool_input: str) -> str:
+        """Canonical form: sorted compact JSON, or the stripped unquoted string"""
+        try:
+            parsed = json.loads(tool_input)
+        except (TypeError, ValueError):
+            return tool_input.strip().strip('"\'`').strip()
+        if isinstance(parsed, str):
+            return parsed.strip()  # '"system.cpu.user"' is the bare metric name
+        return json.dumps(parsed, sort_keys=True, separators=(',', ':'))
+    
+    def begin_cycle(self):
+        """Start a fresh memo scope"""
+        with self._lock:
+            self.entries.clear()
+            self.hits.clear()
+            self.misses.clear()
+            self.active = True
+    
+    def end_cycle(self):
+        """Close the scope and log hit rates"""
+        with self._lock:
+            self.active = False
+            self.entries.clear()
+            hits, calls = sum(self.hits.values()), sum(self.hits.values()) + sum(self.misses.values())
+            per_tool = ', '.join(f"{tool} {self.hits.get(tool, 0)}/{self.hits.get(tool, 0) + self.misses.get(tool, 0)}"
+                                 for tool in sorted(set(self.hits) | set(self.misses)))
+        if calls:
+            logger.info(f"🧮 Tool memo served {hits}/{calls} read calls ({100 * hits / calls:.0f}%) - {per_tool}")
+    
+    def get(self, tool: str, table: Optional[str], tool_input: str) -> Optional[str]:
+        """Memoized result, or None (counted as a miss)"""
+        with self._lock:
+            if not self.active:
+                return None
+            result = self.entries.get((tool, table, self.normalize(tool_input)))
+            counts = self.misses if result is None else self.hits
+            counts[tool] = counts.get(tool, 0) + 1
+            return result
+    
+    def put(self, tool: str, table: Optional[str], tool_input: str, result: str):
+        with self._lock:
+            if self.active:
+                self.entries[(tool, table, self.normalize(tool_input))] = result
+    
+    def invalidate(self, tool: str, table: Optional[str]):
+        """Drop memoized reads of a table after a write to it"""
+        with self._lock:
+            for key in [key for key in self.entries if key[:2] == (tool, table)]:
+                del self.entries[key]
+
 class ServiceNowTool(BaseTool):
     """LangChain tool for ServiceNow operations"""
     
@@ -33,11 +105,22 @@ class ServiceNowTool(BaseTool):
     description: str = """ServiceNow operations tool. Use for:
     - create_incident: Create incident ticket (JSON with title, description, urgency, impact)
     - create_problem: Create problem ticket (JSON with title, description, urgency, impact) 
-    - search_tickets: Search existing tickets (JSON with query parameters)
+    - search_tickets: Search existing tickets (JSON with table, query, optional fields, limit, offset)
     - update_ticket: Update existing ticket (JSON with ticket_id and updates)
-    - get_ticket: Get ticket details (JSON with ticket_id and table_name)
+    - get_ticket: Get ticket details (JSON with ticket_id, table_name and optional fields)
     """
     
+    # Default field projections for table reads
+    search_fields: str = 'number,short_description,state,urgency,impact,sys_created_on,assignment_group'
+    ticket_fields: str = ('number,sys_id,short_description,description,state,urgency,impact,priority,'
+                          'category,subcategory,assignment_group,assigned_to,opened_at,sys_created_on,sys_updated_on')
+    page_size: int = 100
+    
+    # Memoized operations, and the table each write invalidates
+    read_operations: tuple = ('search_tickets', 'get_ticket')
+    write_tables: Dict[str, Optional[str]] = {'create_incident': 'incident', 'create_problem': 'problem',
+                                              'update_ticket': None}
+    
     # ServiceNow connection parameters
     instance_url: str = Field()
     username: str = Field()
@@ -58,6 +141,40 @@ class ServiceNowTool(BaseTool):
             'Content-Type': 'application/json',
             'Accept': 'application/json'
         })
+        object.__setattr__(self, 'session', requests.Session())  # Pooled; the agent hooks it to count calls
+        object.__setattr__(self, 'ticket_cache', TicketStateCache(instance_url, self.headers,
+                                                                  filter_query=f"sys_created_by={username}",
+                                                                  session=self.session))
+        object.__setattr__(self, 'memo', None)  # ToolCallMemo, set by the owning agent
+    
+    def _resolve_sys_id(self, table: str, ticket_number: str) -> Optional[str]:
+        """Resolve ticket number to sys_id, from the local cache when possible"""
+        sys_id = self.ticket_cache.get_sys_id(ticket_number)
+        if sys_id:
+            return sys_id
+        
+        # Unknown locally - pull the latest deltas before falling back to a lookup
+        self.ticket_cache.sync()
+        sys_id = self.ticket_cache.get_sys_id(ticket_number)
+        if sys_id:
+            return sys_id
+        
+        search_url = f"{self.instance_url}/api/now/table/{table}"
+        search_params = {
+            'sysparm_query': f'number={ticket_number}',
+            'sysparm_fields': TicketStateCache.SYNC_FIELDS,
+            'sysparm_exclude_reference_link': 'true',
+            'sysparm_limit': 1
+        }
+        search_response = self.session.get(search_url, headers=self.headers, params=search_params, timeout=30)
+        search_response.raise_for_status()
+        search_results = search_response.json()['result']
+        
+        if not search_results:
+            return None
+        
+        self.ticket_cache.record(table, search_results[0])
+        return search_results[0]['sys_id']
     
     def _run(self, query: str) -> str:
         """Execute ServiceNow operations"""
@@ -65,24 +182,40 @@ class ServiceNowTool(BaseTool):
             operation_data = json.loads(query)
             operation = operation_data.get('operation')
             
-            if operation == 'create_incident':
-                return self._create_incident(operation_data)
-            elif operation == 'create_problem':
-                return self._create_problem(operation_data)
-            elif operation == 'search_tickets':
-                return self._search_tickets(operation_data)
-            elif operation == 'update_ticket':
-                return self._update_ticket(operation_data)
-            elif operation == 'get_ticket':
-                return self._get_ticket(operation_data)
-            else:
-                return f"Unknown operation: {operation}"
+            if self.memo and operation in self.read_operations:
+                table = operation_data.get('table', 'incident')
+                result = self.memo.get(self.name, table, query)
+                if result is None:
+                    result = self._dispatch(operation, operation_data)
+                    if result.startswith('{'):  # Successful reads are compact JSON
+                        self.memo.put(self.name, table, query, result)
+                return result
+            
+            result = self._dispatch(operation, operation_data)
+            if self.memo and operation in self.write_tables:
+                self.memo.invalidate(self.name, self.write_tables[operation] or operation_data.get('table', 'incident'))
+            return result
                 
         except json.JSONDecodeError:
             return "Error: Input must be valid JSON"
         except Exception as e:
             return f"ServiceNow operation failed: {str(e)}"
     
+    def _dispatch(self, operation: str, operation_data: Dict) -> str:
+        """Route an operation to its handler"""
+        if operation == 'create_incident':
+            return self._create_incident(operation_data)
+        elif operation == 'create_problem':
+            return self._create_problem(operation_data)
+        elif operation == 'search_tickets':
+            return self._search_tickets(operation_data)
+        elif operation == 'update_ticket':
+            return self._update_ticket(operation_data)
+        elif operation == 'get_ticket':
+            return self._get_ticket(operation_data)
+        else:
+            return f"Unknown operation: {operation}"
+    
     def _create_incident(self, data: Dict) -> str:
         """Create an incident ticket"""
         try:
@@ -107,20 +240,21 @@ class ServiceNowTool(BaseTool):
             incident_data.update(custom_fields)
             
             url = f"{self.instance_url}/api/now/table/incident"
-            response = requests.post(url, headers=self.headers, json=incident_data, timeout=30)
+            response = self.session.post(url, headers=self.headers, json=incident_data, timeout=30)
             response.raise_for_status()
             
             result = response.json()['result']
+            self.ticket_cache.record('incident', result)
             ticket_number = result.get('number')
             sys_id = result.get('sys_id')
             
-            return json.dumps({
+            return self._compact({
                 'status': 'success',
                 'ticket_number': ticket_number,
                 'sys_id': sys_id,
                 'message': f'Incident {ticket_number} created successfully',
                 'url': f"{self.instance_url}/nav_to.do?uri=incident.do?sys_id={sys_id}"
-            }, indent=2)
+            })
             
         except Exception as e:
             logger.error(f"Failed to create incident: {e}")
@@ -152,20 +286,21 @@ class ServiceNowTool(BaseTool):
             problem_data.update(custom_fields)
             
             url = f"{self.instance_url}/api/now/table/problem"
-            response = requests.post(url, headers=self.headers, json=problem_data, timeout=30)
+            response = self.session.post(url, headers=self.headers, json=problem_data, timeout=30)
             response.raise_for_status()
             
             result = response.json()['result']
+            self.ticket_cache.record('problem', result)
             ticket_number = result.get('number')
             sys_id = result.get('sys_id')
             
-            return json.dumps({
+            return self._compact({
                 'status': 'success',
                 'ticket_number': ticket_number,
                 'sys_id': sys_id,
                 'message': f'Problem {ticket_number} created successfully',
                 'url': f"{self.instance_url}/nav_to.do?uri=problem.do?sys_id={sys_id}"
-            }, indent=2)
+            })
             
         except Exception as e:
             logger.error(f"Failed to create problem: {e}")
@@ -176,25 +311,25 @@ class ServiceNowTool(BaseTool):
         try:
             table = data.get('table', 'incident')
             query = data.get('query', '')
-            limit = data.get('limit', 10)
-            
-            url = f"{self.instance_url}/api/now/table/{table}"
-            params = {
-                'sysparm_query': query,
-                'sysparm_limit': limit,
-                'sysparm_fields': 'number,short_description,state,urgency,impact,sys_created_on,assignment_group'
-            }
-            
-            response = requests.get(url, headers=self.headers, params=params, timeout=30)
-            response.raise_for_status()
-            
-            results = response.json()['result']
-            
-            return json.dumps({
+            limit = int(data.get('limit', 10))
+            offset = int(data.get('offset', 0))
+            fields = data.get('fields', self.search_fields)
+            if isinstance(fields, list):
+                fields = ','.join(fields)
+            
+            # Paged read: memory stays bounded by page size however large the match set
+            records = iter_table_records(
+                self.instance_url, self.headers, table, query=query, fields=fields,
+                page_size=min(self.page_size, limit), max_results=limit, offset=offset, session=self.session
+            )
+            results = list(records)
+            
+            return self._compact({
                 'status': 'success',
                 'count': len(results),
+                'next_offset': offset + len(results) if len(results) == limit else None,
                 'tickets': results
-            }, indent=2)
+            })
             
         except Exception as e:
             return f"Failed to search tickets: {str(e)}"
@@ -212,36 +347,27 @@ class ServiceNowTool(BaseTool):
             
             # If only ticket number provided, find sys_id
             if ticket_number and not sys_id:
-                search_url = f"{self.instance_url}/api/now/table/{table}"
-                search_params = {
-                    'sysparm_query': f'number={ticket_number}',
-                    'sysparm_fields': 'sys_id'
-                }
-                search_response = requests.get(search_url, headers=self.headers, params=search_params, timeout=30)
-                search_response.raise_for_status()
-                search_results = search_response.json()['result']
-                
-                if not search_results:
+                sys_id = self._resolve_sys_id(table, ticket_number)
+                if not sys_id:
                     return f"Ticket {ticket_number} not found"
-                
-                sys_id = search_results[0]['sys_id']
             
             # Add AI work note
             if 'work_notes' not in updates:
                 updates['work_notes'] = f"Updated by AI agent at {datetime.now(timezone.utc).isoformat()}"
             
             url = f"{self.instance_url}/api/now/table/{table}/{sys_id}"
-            response = requests.patch(url, headers=self.headers, json=updates, timeout=30)
+            response = self.session.patch(url, headers=self.headers, json=updates, timeout=30)
             response.raise_for_status()
             
             result = response.json()['result']
+            self.ticket_cache.record(table, result)
             
-            return json.dumps({
+            return self._compact({
                 'status': 'success',
                 'message': f'Ticket updated successfully',
                 'ticket_number': result.get('number'),
                 'updates': updates
-            }, indent=2)
+            })
             
         except Exception as e:
             return f"Failed to update ticket: {str(e)}"
@@ -254,35 +380,34 @@ class ServiceNowTool(BaseTool):
             ticket_number = data.get('ticket_number')
             
             if ticket_number and not sys_id:
-                # Search by ticket number first
-                search_url = f"{self.instance_url}/api/now/table/{table}"
-                search_params = {
-                    'sysparm_query': f'number={ticket_number}',
-                    'sysparm_limit': 1
-                }
-                search_response = requests.get(search_url, headers=self.headers, params=search_params, timeout=30)
-                search_response.raise_for_status()
-                search_results = search_response.json()['result']
-                
-                if not search_results:
+                sys_id = self._resolve_sys_id(table, ticket_number)
+                if not sys_id:
                     return f"Ticket {ticket_number} not found"
-                
-                result = search_results[0]
-            else:
-                # Get by sys_id
-                url = f"{self.instance_url}/api/now/table/{table}/{sys_id}"
-                response = requests.get(url, headers=self.headers, timeout=30)
-                response.raise_for_status()
-                result = response.json()['result']
             
-            return json.dumps({
+            fields = data.get('fields', self.ticket_fields)
+            if isinstance(fields, list):
+                fields = ','.join(fields)
+            
+            # Get by sys_id
+            url = f"{self.instance_url}/api/now/table/{table}/{sys_id}"
+            params = {'sysparm_fields': fields, 'sysparm_exclude_reference_link': 'true'}
+            response = self.session.get(url, headers=self.headers, params=params, timeout=30)
+            response.raise_for_status()
+            result = response.json()['result']
+            self.ticket_cache.record(table, result)
+            
+            return self._compact({
                 'status': 'success',
                 'ticket': result
-            }, indent=2)
+            })
             
         except Exception as e:
             return f"Failed to get ticket: {str(e)}"
     
+    def _compact(self, payload: Dict) -> str:
+        """Compact JSON for tool output (smaller prompt, faster to serialize)"""
+        return json.dumps(payload, separators=(',', ':'))
+    
     def _map_urgency(self, urgency: str) -> str:
         """Map urgency levels to ServiceNow values"""
         mapping = {
@@ -324,8 +449,22 @@ class DatadogMetricsTool(BaseTool):
             'DD-APPLICATION-KEY': app_key,
             'Content-Type': 'application/json'
         })
+        object.__setattr__(self, 'session', requests.Session())  # Pooled; the agent hooks it to count calls
+        object.__setattr__(self, 'memo', None)  # ToolCallMemo, set by the owning agent
     
     def _run(self, query: str) -> str:
+        """Query Datadog metrics (memoized within a monitoring cycle)"""
+        if not self.memo:
+            return self._query(ToolCallMemo.normalize(query))
+        
+        result = self.memo.get(self.name, None, query)
+        if result is None:
+            result = self._query(ToolCallMemo.normalize(query))
+            if result.startswith('['):  # Successful reads are a JSON list
+                self.memo.put(self.name, None, query, result)
+        return result
+    
+    def _query(self, query: str) -> str:
         """Query Datadog metrics"""
         try:
             current_time = datetime.now(timezone.utc)
@@ -338,10 +477,9 @@ class DatadogMetricsTool(BaseTool):
                 'to': int(current_time.timestamp())
             }
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=15)
-            response.raise_for_status()
-            
-            data = response.json()
+            with self.session.get(url, headers=self.headers, params=params, timeout=15, stream=True) as response:
+                response.raise_for_status()
+                data = SeriesStreamDecoder.decode_response(response)
             series = data.get('series', [])
             
             if not series:
@@ -349,9 +487,9 @@ class DatadogMetricsTool(BaseTool):
             
             results = []
             for serie in series:
-                points = serie.get('pointlist', [])
-                if points:
-                    latest_value = points[-1][1]
+                values = serie['values']
+                if values:
+                    latest_value = None if math.isnan(values[-1]) else values[-1]
                     results.append({
                         'metric': query,
                         'value': latest_value,
@@ -363,12 +501,121 @@ class DatadogMetricsTool(BaseTool):
         except Exception as e:
             return f"Error querying metric {query}: {str(e)}"
 
+class CycleMemory:
+    """Bounded cross-cycle memory of decisions and metric trends, per scope
+    
+    The newest decisions are kept verbatim; older ones are folded into one
+    running summary line per alert (cycles seen, tickets involved), and the
+    rendered text is trimmed to a token budget however long the agent runs.
+    """
+    
+    TICKET_NUMBER = re.compile(r'\b(?:INC|PRB|CHG)\d{7}\b')
+    
+    def __init__(self, token_budget: int = 600, recent_decisions: int = 4, trend_points: int = 6,
+                 summary_keys: int = 12):
+        self.token_budget = token_budget
+        self.recent_decisions = recent_decisions
+        self.trend_points = trend_points
+        self.summary_keys = summary_keys
+        self.scopes = {}  # scope -> {'trends': {metric: [values]}, 'decisions': [...], 'summary': {alert: {...}}}
+    
+    def _scope(self, scope: str) -> Dict:
+        return self.scopes.setdefault(scope, {'trends': {}, 'decisions': [], 'summary': {}})
+    
+    def observe(self, metrics: Dict, scope: str = '*'):
+        """Add this cycle's metric values to the trend window"""
+        trends = self._scope(scope)['trends']
+        for metric, value in metrics.items():
+            window = trends.setdefault(metric, [])
+            window.append(round(float(value), 2))
+            del window[:-self.trend_points]
+    
+    def record_decision(self, alert_key: str, output: str, steps: List, scope: str = '*'):
+        """Remember what the agent did this cycle (tool actions and tickets touched)"""
+        memory = self._scope(scope)
+        actions, tickets = [], []
+        for action, observation in steps:
+            try:
+                operation = json.loads(action.tool_input).get('operation', action.tool)
+            except (TypeError, ValueError, AttributeError):
+                operation = getattr(action, 'tool', 'tool')
+            numbers = self.TICKET_NUMBER.findall(str(observation))
+            if operation in ('create_incident', 'create_problem', 'update_ticket'):
+                tickets.extend(numbers[:1])
+                actions.append(f"{operation} {' '.join(numbers[:1])}".strip())
+            else:
+                actions.append(operation)
+        
+        memory['decisions'].append({
+            'time': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M'),
+            'alert': alert_key or 'healthy',
+            'actions': actions,
+            'tickets': tickets,
+            'outcome': ' '.join(str(output).split())[:200]
+        })
+        
+        # Fold decisions beyond the recent window into the per-alert summary
+        while len(memory['decisions']) > self.recent_decisions:
+            old = memory['decisions'].pop(0)
+            entry = memory['summary'].setdefault(old['alert'], {'cycles': 0, 'first': old['time'], 'tickets': []})
+            entry['cycles'] += 1
+            entry['last'] = old['time']
+            entry['tickets'] = (entry['tickets'] + [t for t in old['tickets'] if t not in entry['tickets']])[-5:]
+        if len(memory['summary']) > self.summary_keys:
+            oldest = sorted(memory['summary'], key=lambda alert: memory['summary'][alert]['last'])
+            for alert in oldest[:len(memory['summary']) - self.summary_keys]:
+                del memory['summary'][alert]
+    
+    def render(self, scope: str = '*') -> str:
+        """Memory as prompt text, most useful lines first, within the token budget"""
+        memory = self.scopes.get(scope)
+        if not memory:
+            return 'No previous cycles.'
+        
+        lines = []
+        for metric, window in memory['trends'].items():
+            direction = 'rising' if window[-1] > window[0] else 'falling' if window[-1] < window[0] else 'flat'
+            lines.append(f"Trend {metric}: {' -> '.join(map(str, window))} ({direction})")
+        for decision in reversed(memory['decisions']):
+            actions = ', '.join(decision['actions']) or 'no tool calls'
+            lines.append(f"{decision['time']} [{decision['alert']}] {actions}: {decision['outcome']}")
+        for alert, entry in sorted(memory['summary'].items(), key=lambda item: item[1]['last'], reverse=True):
+            tickets = f", tickets {' '.join(entry['tickets'])}" if entry['tickets'] else ''
+            lines.append(f"Earlier [{alert}]: {entry['cycles']} cycles {entry['first']} to {entry['last']}{tickets}")
+        
+        rendered, used = [], 0
+        for line in lines:
+            cost = self.estimate_tokens(line)
+            if used + cost > self.token_budget:
+                continue
+            rendered.append(line)
+            used += cost
+        return '\n'.join(rendered)
+    
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """Rough token count (~4 characters per token)"""
+        return len(text) // 4 + 1
+    
+    def snapshot_state(self) -> Dict:
+        """State for agent snapshots"""
+        return {'scopes': self.scopes}
+    
+    def restore_state(self, state: Dict):
+        """Restore from an agent snapshot"""
+        self.scopes.update(state.get('scopes', {}))
+
 class ServiceNowAIAgent:
     """AI Agent for ServiceNow ticket management with infrastructure monitoring"""
     
     def __init__(self, servicenow_instance: str, servicenow_user: str, servicenow_password: str,
                  datadog_api_key: str, datadog_app_key: str, openai_api_key: str,
-                 datadog_site: str = "datadoghq.com", monitoring_interval: int = 300):
+                 datadog_site: str = "datadoghq.com", monitoring_interval: int = 300,
+                 state_snapshot: Optional[str] = None, alert_dedup_window: int = 3600,
+                 profile_threshold: float = 120.0, profile_dir: str = 'cycle_profiles',
+                 adaptive_interval: bool = False, min_interval: int = 60, max_interval: Optional[int] = None,
+                 api_budget: Optional[ApiCallBudget] = None, memory_token_budget: int = 600,
+                 open_ticket_limit: int = 10):
         
         # Initialize OpenAI
         self.llm = ChatOpenAI(
@@ -430,8 +677,44 @@ Previous actions: {agent_scratchpad}
         
         self.monitoring_interval = monitoring_interval
         self.last_alert_time = {}  # Track alerts to prevent duplicates
+        self.memory = CycleMemory(memory_token_budget)  # Context carried between agent runs
+        self.open_ticket_limit = open_ticket_limit  # Most recently updated open tickets shown in the prompt
+        self.alert_dedup_window = alert_dedup_window
+        self.analyzer = InfrastructureAnalyzer()
+        
+        # Repeat read calls within a cycle (including the metric collection) are served from memory
+        self.tool_memo = ToolCallMemo()
+        object.__setattr__(self.servicenow_tool, 'memo', self.tool_memo)
+        object.__setattr__(self.datadog_tool, 'memo', self.tool_memo)
+        self.profiler = CycleProfiler(profile_threshold, profile_dir)
+        
+        # Adaptive cadence: count every Datadog/ServiceNow HTTP call (reads, writes, cache syncs)
+        self.scheduler = None
+        self.api_calls = 0
+        if adaptive_interval:
+            self.scheduler = AdaptiveScheduler(monitoring_interval, min_interval, max_interval, budget=api_budget)
+            for session in (self.servicenow_tool.session, self.datadog_tool.session):
+                session.hooks['response'].append(self._count_api_call)
+        
+        # Warm restart: alert dedup history and ticket map survive deploys
+        self.state_store = None
+        if state_snapshot:
+            self.state_store = AgentStateStore(state_snapshot)
+            self.state_store.register('ticket_cache', self.servicenow_tool.ticket_cache)
+            self.state_store.register('alerts', self)
+            self.state_store.register('memory', self.memory)
+            self.state_store.restore()
     
-    def analyze_and_create_ticket(self, metrics_data: Dict, issue_description: str = None) -> str:
+    def snapshot_state(self) -> Dict:
+        """Alert dedup state for agent snapshots"""
+        return {'last_alert_time': dict(self.last_alert_time)}
+    
+    def restore_state(self, state: Dict):
+        """Restore alert dedup state from an agent snapshot"""
+        self.last_alert_time.update(state.get('last_alert_time', {}))
+    
+    def analyze_and_create_ticket(self, metrics_data: Dict, issue_description: str = None,
+                                  alert_key: str = '') -> str:
         """Analyze metrics and create appropriate ServiceNow tickets"""
         
         task = f"""
@@ -441,9 +724,14 @@ Metrics Data: {json.dumps(metrics_data, indent=2)}
 
 Issue Description: {issue_description or "Automated monitoring detected potential issues"}
 
+Open Tickets (local cache, current as of this cycle): {json.dumps(self._open_ticket_summary())}
+
+Agent Memory (trends and your decisions in previous cycles):
+{self.memory.render()}
+
 Steps to follow:
 1. Analyze the metrics data to identify any issues (CPU > 85%, Memory < 15%, Disk > 90%, Load > 5.0)
-2. Search ServiceNow for similar recent tickets to avoid duplicates
+2. Check the open tickets and agent memory above, and search ServiceNow only if they are not enough to rule out duplicates
 3. If issues found and no recent duplicate tickets exist:
    - Create incident ticket for immediate operational impact
    - Create problem ticket if this appears to be a recurring or systemic issue
@@ -455,11 +743,25 @@ Provide a summary of actions taken.
         
         try:
             result = self.agent_executor.invoke({"input": task})
-            return result.get('output', 'No output received')
+            output = result.get('output', 'No output received')
+            self.memory.record_decision(alert_key, output, result.get('intermediate_steps', []))
+            return output
         except Exception as e:
             logger.error(f"Agent execution failed: {e}")
             return f"Failed to analyze and create ticket: {str(e)}"
     
+    def _open_ticket_summary(self) -> List[Dict]:
+        """Compact list of the agent's most recently updated open tickets (bounded for the prompt)"""
+        tickets = sorted(self.servicenow_tool.ticket_cache.open_tickets(),
+                         key=lambda t: t.get('sys_updated_on', ''), reverse=True)
+        summary = [
+            {'number': t['number'], 'short_description': t.get('short_description', '')[:100], 'state': t.get('state')}
+            for t in tickets[:self.open_ticket_limit]
+        ]
+        if len(tickets) > self.open_ticket_limit:
+            summary.append({'more_open_tickets': len(tickets) - self.open_ticket_limit})
+        return summary
+    
     def create_incident_for_alert(self, alert_data: Dict) -> str:
         """Create incident ticket for PagerDuty alert"""
         
@@ -490,28 +792,76 @@ Return the created ticket number and details.
     
     def run_monitoring_cycle(self):
         """Run monitoring cycle and create tickets for issues"""
+        self.tool_memo.begin_cycle()
+        calls_before = self.api_calls
+        try:
+            with self.profiler.cycle('servicenow_ai_cycle'):
+                analysis = self._run_monitoring_cycle()
+            if self.scheduler:
+                self.scheduler.update(analysis, self.analyzer.thresholds, self.api_calls - calls_before)
+            return analysis
+        finally:
+            self.tool_memo.end_cycle()
+    
+    @property
+    def next_interval(self) -> float:
+        """Seconds until the next cycle (adaptive when enabled)"""
+        return self.scheduler.interval if self.scheduler else self.monitoring_interval
+    
+    def _count_api_call(self, response, *args, **kwargs):
+        """Session response hook counting Datadog/ServiceNow calls"""
+        self.api_calls += 1
+    
+    def _run_monitoring_cycle(self):
+        """Monitoring cycle steps (timed as profiler spans)"""
         logger.info("🎫 Starting ServiceNow AI monitoring cycle...")
         
         # Collect key metrics
         metrics = ['system.cpu.user', 'system.mem.pct_usable', 'system.disk.in_use', 'system.load.1']
         metrics_data = {}
+        # Missing data defaults to healthy values (100% memory available, 0 otherwise)
+        defaults = {'system.mem.pct_usable': 100}
         
-        for metric in metrics:
-            result = self.datadog_tool._run(metric)
-            try:
-                parsed_result = json.loads(result)
-                if isinstance(parsed_result, list) and parsed_result:
-                    metrics_data[metric] = parsed_result[0].get('value', 0)
-                else:
-                    metrics_data[metric] = 0
-            except:
-                metrics_data[metric] = 0
+        with self.profiler.span('collect_metrics'):
+            for metric in metrics:
+                result = self.datadog_tool._run(metric)
+                value = None
+                try:
+                    parsed_result = json.loads(result)
+                    if isinstance(parsed_result, list) and parsed_result:
+                        value = parsed_result[0].get('value')
+                except:
+                    pass
+                metrics_data[metric] = value or defaults.get(metric, 0)
         
         logger.info(f"📊 Collected metrics: {metrics_data}")
         
-        # Analyze and create tickets if needed
-        result = self.analyze_and_create_ticket(metrics_data)
-        logger.info(f"🧠 AI Analysis Result: {result}")
+        # Refresh local ticket state (delta since last watermark)
+        with self.profiler.span('ticket_cache_sync'):
+            self.servicenow_tool.ticket_cache.sync()
+        
+        # Skip the agent run if this exact alert was already handled recently
+        analysis = self.analyzer.analyze_metrics(metrics_data)
+        self.memory.observe(metrics_data)
+        issues = analysis['issues']
+        alert_key = '|'.join(sorted(f"{issue['metric']}:{issue['severity']}" for issue in issues))
+        if alert_key and time.time() - self.last_alert_time.get(alert_key, 0) < self.alert_dedup_window:
+            logger.info(f"⏭️ Alert already handled recently ({alert_key}) - skipping agent run")
+        else:
+            # Analyze and create tickets if needed
+            with self.profiler.span('agent_executor'):
+                result = self.analyze_and_create_ticket(metrics_data, alert_key=alert_key)
+            logger.info(f"🧠 AI Analysis Result: {result}")
+            if alert_key:
+                self.last_alert_time[alert_key] = time.time()
+        
+        if self.state_store:
+            now = time.time()
+            self.last_alert_time = {k: t for k, t in self.last_alert_time.items() if now - t < self.alert_dedup_window}
+            with self.profiler.span('state_snapshot'):
+                self.state_store.maybe_save()
+        
+        return analysis
     
     def run_continuous_monitoring(self):
         """Run continuous monitoring with ServiceNow integration"""
@@ -543,11 +893,13 @@ Return the created ticket number and details.
         while True:
             try:
                 self.run_monitoring_cycle()
-                logger.info(f"😴 Sleeping for {self.monitoring_interval} seconds...")
-                time.sleep(self.monitoring_interval)
+                logger.info(f"😴 Sleeping for {self.next_interval:.0f} seconds...")
+                time.sleep(self.next_interval)
                 
             except KeyboardInterrupt:
                 logger.info("🛑 ServiceNow monitoring stopped by user")
+                if self.state_store:
+                    self.state_store.save()
                 break
             except Exception as e:
                 logger.error(f"💥 Error in monitoring cycle: {e}")
@@ -567,6 +919,15 @@ def main():
     
     openai_api_key = os.getenv('OPENAI_API_KEY')
     monitoring_interval = int(os.getenv('MONITORING_INTERVAL', '600'))  # 10 minutes default for tickets
+    state_snapshot = os.getenv('STATE_SNAPSHOT')
+    profile_threshold = float(os.getenv('PROFILE_THRESHOLD', '120'))
+    profile_dir = os.getenv('PROFILE_DIR', 'cycle_profiles')
+    adaptive_interval = os.getenv('ADAPTIVE_INTERVAL', 'false').lower() == 'true'
+    min_interval = int(os.getenv('MIN_INTERVAL', '60'))
+    max_interval = int(os.getenv('MAX_INTERVAL', str(monitoring_interval * 4)))
+    api_budget = float(os.getenv('API_BUDGET_PER_HOUR', '0'))
+    memory_token_budget = int(os.getenv('MEMORY_TOKEN_BUDGET', '600'))
+    open_ticket_limit = int(os.getenv('OPEN_TICKET_LIMIT', '10'))
     
     # Validate required variables
     required_vars = {
@@ -587,6 +948,14 @@ def main():
         print("  - SERVICENOW_INSTANCE (default: https://dev221843.service-now.com)")
         print("  - DATADOG_SITE (default: datadoghq.com)")
         print("  - MONITORING_INTERVAL (default: 600)")
+        print("  - STATE_SNAPSHOT (file for agent state snapshots / warm restart)")
+        print("  - PROFILE_THRESHOLD (default: 120 seconds; slower cycles are profiled)")
+        print("  - PROFILE_DIR (default: cycle_profiles)")
+        print("  - ADAPTIVE_INTERVAL (true: tighten on issues/trends, back off when healthy; default: false)")
+        print("  - MIN_INTERVAL (default: 60) / MAX_INTERVAL (default: 4x MONITORING_INTERVAL)")
+        print("  - API_BUDGET_PER_HOUR (Datadog + ServiceNow calls; default: unlimited)")
+        print("  - MEMORY_TOKEN_BUDGET (prompt tokens for cross-cycle agent memory; default: 600)")
+        print("  - OPEN_TICKET_LIMIT (open tickets listed in the agent prompt; default: 10)")
         print("\n💡 Example setup:")
         print("export SERVICENOW_USER='your_username'")
         print("export SERVICENOW_PASSWORD='your_password'")
@@ -604,7 +973,16 @@ def main():
             datadog_app_key=datadog_app_key,
             openai_api_key=openai_api_key,
             datadog_site=datadog_site,
-            monitoring_interval=monitoring_interval
+            monitoring_interval=monitoring_interval,
+            state_snapshot=state_snapshot,
+            profile_threshold=profile_threshold,
+            profile_dir=profile_dir,
+            adaptive_interval=adaptive_interval,
+            min_interval=min_interval,
+            max_interval=max_interval,
+            api_budget=ApiCallBudget(api_budget) if api_budget else None,
+            memory_token_budget=memory_token_budget,
+            open_ticket_limit=open_ticket_limit
         )
         
         agent.run_continuous_monitoring()